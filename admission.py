@@ -0,0 +1,89 @@
+import os
+import threading
+import time
+
+from github_client import UpstreamError
+
+# Admission control configuration
+ADMISSION_MAX_ACTIVE = int(os.environ.get('ADMISSION_MAX_ACTIVE', '16'))  # Snapshot builds run at once per process, 0 to disable admission control
+ADMISSION_QUEUE_SIZE = int(os.environ.get('ADMISSION_QUEUE_SIZE', '32'))  # Requests waiting for a slot; more are shed with a 503
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get('ADMISSION_QUEUE_TIMEOUT', '2'))  # Seconds a request waits for a slot before it is shed
+ADMISSION_RETRY_AFTER = float(os.environ.get('ADMISSION_RETRY_AFTER', '5'))  # Retry-After sent with shed requests
+REQUEST_DEADLINE = float(os.environ.get('REQUEST_DEADLINE', '10'))  # Seconds a request waits on GitHub before giving up, 0 for no limit
+
+class Overloaded(UpstreamError):
+    """Raised when a request is shed, so it is answered with 503 and Retry-After like an unavailable GitHub"""
+
+    @property
+    def retry_later(self):
+        return True
+
+class DeadlineExceeded(UpstreamError):
+    """Raised when GitHub has not answered within the request deadline; the fetches carry on in the background"""
+
+    @property
+    def retry_later(self):
+        return True
+
+class AdmissionController:
+    """Caps the snapshot builds running at once, with a bounded queue in front of them.
+
+    A request that finds every slot taken waits in the queue for up to
+    queue_timeout seconds; one that finds the queue full, or times out in
+    it, raises Overloaded at once. Waiting is bounded either way, so under
+    overload the excess is shed quickly instead of every request slowing
+    down until clients time out.
+    """
+
+    def __init__(self, max_active=ADMISSION_MAX_ACTIVE, queue_size=ADMISSION_QUEUE_SIZE,
+                 queue_timeout=ADMISSION_QUEUE_TIMEOUT, retry_after=ADMISSION_RETRY_AFTER):
+        self.max_active = max_active
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.active = 0
+        self.waiting = 0
+        self._cond = threading.Condition()
+        self._counters = {'admitted': 0, 'queued': 0, 'shed': 0, 'timed_out': 0}
+
+    def acquire(self):
+        """Take a slot, waiting in the queue if needed; raises Overloaded when the request is shed"""
+        if self.max_active <= 0:
+            return
+        with self._cond:
+            if self.active >= self.max_active:
+                if self.waiting >= self.queue_size:
+                    self._counters['shed'] += 1
+                    raise Overloaded('Server is overloaded; try again later', retry_after=self.retry_after)
+                self._counters['queued'] += 1
+                self.waiting += 1
+                deadline = time.monotonic() + self.queue_timeout
+                try:
+                    while self.active >= self.max_active:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            self._counters['timed_out'] += 1
+                            raise Overloaded('Server is overloaded; try again later', retry_after=self.retry_after)
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+            self.active += 1
+            self._counters['admitted'] += 1
+
+    def release(self):
+        if self.max_active <= 0:
+            return
+        with self._cond:
+            self.active -= 1
+            self._cond.notify()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def stats(self):
+        with self._cond:
+            return {'active': self.active, 'waiting': self.waiting, **self._counters}
@@ -0,0 +1,290 @@
+"""ASGI entry point serving the page, /api/user/<username>[/stream] and /api/generate-readme/<username> without blocking on GitHub.
+
+Upstream calls go through AsyncGitHubClient, so a single worker keeps as many
+users in flight as GitHub's latency allows instead of one per thread. The
+metrics themselves come from the same calculate_* and generate_*_template
+functions as the Flask app. They share its snapshot cache, response cache,
+token pool, circuit breaker and history store. The GraphQL backend and
+byte-weighted language stats still use the sync client and run on a worker
+thread. There is no admission queue, since a waiting request holds no
+thread, but REQUEST_DEADLINE and the stale fallback apply as in the Flask app.
+The stream endpoint sends every section at once, when the coalesced snapshot
+build finishes, rather than section by section.
+
+Run with: uvicorn asgi_app:app --workers 1
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+from urllib.parse import parse_qs
+
+from admission import ADMISSION_RETRY_AFTER, REQUEST_DEADLINE, DeadlineExceeded
+from core import (GITHUB_API_URL, GITHUB_FETCH_BACKEND, calculate_achievements, fetch_user_profile, get_headers,
+                  github as sync_github, history, last_known_snapshot, make_snapshot, mark_stale, render_readme,
+                  snapshots, stream_snapshot_sections, summarize_events, summarize_repos, user_stats)
+from async_client import AsyncGitHubClient
+from github_client import UpstreamError, decode_json, raise_for_upstream
+from history_store import HISTORY_EVENT_PAGES
+from http_caching import CACHE_CONTROL, COMPRESSION_LEVEL, COMPRESSION_MIN_SIZE
+from instrumentation import begin_request, server_timing, timed
+from language_stats import LANGUAGE_STATS_MODE
+from readme_renderer import README_TEMPLATES
+from records import event_record, repo_record
+
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'index.html'), 'rb') as f:
+    INDEX_HTML = f.read()
+
+# Created on the server's event loop at startup; the sync client's cache and token budget are shared
+github = None
+# Snapshot builds in flight, so concurrent requests for a user share one fetch-and-compute
+_inflight = {}
+
+def get_async_client():
+    global github
+    if github is None:
+        github = AsyncGitHubClient(get_headers(), cache=sync_github.cache, token_pool=sync_github.token_pool,
+                                   breaker=sync_github.breaker)
+    return github
+
+async def fetch_user_data(username):
+    """Fetch user profile data from GitHub API"""
+    with timed('fetch_user_data'):
+        response = await get_async_client().get(f'{GITHUB_API_URL}/users/{username}')
+        if response.status_code == 200:
+            return decode_json(response)
+        if response.status_code == 404:
+            return None
+        raise_for_upstream(response)
+
+async def fetch_user_repos(username):
+    """Fetch all user repositories, following pagination"""
+    with timed('fetch_user_repos'):
+        repos = await get_async_client().get_all_pages(f'{GITHUB_API_URL}/users/{username}/repos?per_page=100',
+                                                       project=repo_record)
+        return repos if repos is not None else []
+
+async def fetch_user_events(username, page=1):
+    """Fetch user recent events for activity analysis"""
+    url = f'{GITHUB_API_URL}/users/{username}/events?per_page=100'
+    if page > 1:
+        url += f'&page={page}'
+    with timed('fetch_user_events'):
+        response = await get_async_client().get(url, project=event_record)
+        if response.status_code == 200:
+            return decode_json(response)
+        if response.status_code == 404:
+            return []
+        raise_for_upstream(response)
+
+async def fetch_new_events(username):
+    """Fetch the events newer than the newest one in the history store, paging back until a known one"""
+    last_id = history.last_event_id(username)
+    events = []
+    for page in range(1, HISTORY_EVENT_PAGES + 1):
+        new_events = [event for event in await fetch_user_events(username, page) if int(event.id) > last_id]
+        events.extend(new_events)
+        if len(new_events) < 100:
+            break
+    return events
+
+async def fetch_user_bundle(username):
+    """(user_data, repos, events) fetched concurrently; None for all three when the user does not exist"""
+    fetch_events = fetch_new_events if history is not None else fetch_user_events
+    if GITHUB_FETCH_BACKEND == 'graphql':
+        profile, events = await asyncio.gather(asyncio.to_thread(fetch_user_profile, username),
+                                               fetch_events(username))
+        if profile is None:
+            return None, None, None
+        return profile[0], profile[1], events
+
+    user, repos, events = (asyncio.ensure_future(fetch(username))
+                           for fetch in (fetch_user_data, fetch_user_repos, fetch_events))
+    try:
+        user_data = await user
+        if not user_data:
+            return None, None, None
+        return user_data, await repos, await events
+    finally:
+        for future in (repos, events):
+            future.cancel()
+
+async def build_metrics_snapshot(username):
+    """Fetch a user's data and compute every metric the endpoints need; None if the user does not exist"""
+    user_data, repos, events = await fetch_user_bundle(username)
+    if not user_data:
+        return None
+
+    if LANGUAGE_STATS_MODE == 'bytes':
+        # Breakdowns not cached yet are fetched by LanguageStats' pool on the sync client
+        repo_stats = await asyncio.to_thread(summarize_repos, repos)
+    else:
+        repo_stats = summarize_repos(repos)
+    event_stats, events = summarize_events(username, user_data, repos, events)
+    achievements = calculate_achievements(user_data, repos, events, event_stats['contributions'])
+    return make_snapshot(username, user_data, repo_stats, event_stats, achievements)
+
+async def get_metrics_snapshot(username):
+    """Return a user's cached metrics snapshot, or build it, coalescing concurrent builds for the same user"""
+    key = username.lower()
+    snapshot = snapshots.get(key)
+    if snapshot is not None:
+        return snapshot
+    build = _inflight.get(key)
+    if build is None:
+        build = _inflight[key] = asyncio.ensure_future(build_metrics_snapshot(username))
+        build.add_done_callback(lambda _: _inflight.pop(key, None))
+    # Shielded so one client disconnecting, or giving up at its deadline, does not cancel the build the others wait on
+    try:
+        return await asyncio.wait_for(asyncio.shield(build), REQUEST_DEADLINE or None)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f'GitHub did not answer within {REQUEST_DEADLINE:g}s', retry_after=ADMISSION_RETRY_AFTER)
+
+async def serve_metrics_snapshot(username):
+    """(snapshot, None), or (last-known snapshot, fetched_at) when GitHub fails or is too slow, like core's"""
+    try:
+        return await get_metrics_snapshot(username), None
+    except UpstreamError:
+        snapshot, fetched_at = last_known_snapshot(username)
+        if snapshot is None:
+            raise
+        return snapshot, fetched_at
+
+class Response:
+    """A buffered response; http_cacheable ones get an ETag, 304s and Cache-Control like the Flask app"""
+
+    def __init__(self, body, status=200, content_type='application/json', http_cacheable=False):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.http_cacheable = http_cacheable
+        self.headers = {}
+
+def json_response(data, status=200, http_cacheable=False):
+    # Serialized like Flask's jsonify, so both entry points return identical bodies
+    return Response(json.dumps(data, sort_keys=True, separators=(',', ':')).encode() + b'\n', status,
+                    http_cacheable=http_cacheable)
+
+def snapshot_response(body, fetched_at):
+    """JSON response for a metrics snapshot; last-known data is flagged stale and kept out of HTTP caches"""
+    if fetched_at is None:
+        return json_response(body, http_cacheable=True)
+    response = json_response(mark_stale(body, fetched_at))
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+async def index(username, query):
+    return Response(INDEX_HTML, content_type='text/html; charset=utf-8')
+
+async def get_user_stats(username, query):
+    """Get comprehensive user statistics"""
+    snapshot, fetched_at = await serve_metrics_snapshot(username)
+    if snapshot is None:
+        return json_response({'error': 'User not found'}, 404)
+    return snapshot_response(user_stats(username, snapshot), fetched_at)
+
+async def stream_user_stats(username, query):
+    """User statistics as NDJSON sections, in the format of the Flask app's stream"""
+    snapshot, fetched_at = await serve_metrics_snapshot(username)
+    if snapshot is None:
+        return json_response({'error': 'User not found'}, 404)
+    response = Response(''.join(stream_snapshot_sections(username, snapshot, fetched_at)).encode(),
+                        content_type='application/x-ndjson')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+async def generate_readme(username, query):
+    """Generate README markdown with multiple template options; template=all renders every one"""
+    template = query.get('template', ['default'])[0]
+    snapshot, fetched_at = await serve_metrics_snapshot(username)
+    if snapshot is None:
+        return json_response({'error': 'User not found'}, 404)
+    if template == 'all':
+        readmes = {name: render_readme(snapshot, name) for name in README_TEMPLATES}
+        return snapshot_response({'readmes': readmes, 'template': template}, fetched_at)
+    return snapshot_response({'readme': render_readme(snapshot, template), 'template': template}, fetched_at)
+
+ROUTES = (
+    (re.compile(r'/'), index),
+    (re.compile(r'/api/user/(?P<username>[^/]+)'), get_user_stats),
+    (re.compile(r'/api/user/(?P<username>[^/]+)/stream'), stream_user_stats),
+    (re.compile(r'/api/generate-readme/(?P<username>[^/]+)'), generate_readme),
+)
+
+def upstream_error_response(error):
+    """Report GitHub failures instead of returning empty stats"""
+    response = json_response({'error': str(error)}, error.http_status)
+    if error.retry_after is not None:
+        response.headers['Retry-After'] = str(int(math.ceil(error.retry_after)))
+    return response
+
+async def dispatch(scope):
+    if scope['method'] not in ('GET', 'HEAD'):
+        return json_response({'error': 'Method not allowed'}, 405)
+    for pattern, view in ROUTES:
+        match = pattern.fullmatch(scope['path'])
+        if match is not None:
+            query = parse_qs(scope['query_string'].decode('latin-1'))
+            try:
+                return await view(match.groupdict().get('username'), query)
+            except UpstreamError as error:
+                return upstream_error_response(error)
+    return json_response({'error': 'Not found'}, 404)
+
+def finish(scope, response):
+    """Add Server-Timing, HTTP caching and compression headers; returns the header list and body"""
+    request_headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+    body = response.body
+    headers = dict(response.headers)
+    headers['Content-Type'] = response.content_type
+    timing = server_timing()
+    if timing:
+        headers['Server-Timing'] = timing
+
+    encoding = None
+    if response.status == 200 and len(body) >= COMPRESSION_MIN_SIZE:
+        headers['Vary'] = 'Accept-Encoding'
+        if 'gzip' in request_headers.get('accept-encoding', ''):
+            encoding = 'gzip'
+    status = response.status
+    if response.status == 200 and response.http_cacheable:
+        digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        etag = f'"{digest}-{encoding}"' if encoding else f'"{digest}"'
+        headers['ETag'] = etag
+        headers['Cache-Control'] = CACHE_CONTROL
+        if etag in request_headers.get('if-none-match', ''):
+            status, body, encoding = 304, b'', None
+    if encoding:
+        body = gzip.compress(body, COMPRESSION_LEVEL, mtime=0)
+        headers['Content-Encoding'] = encoding
+    headers['Content-Length'] = str(len(body))
+    if scope['method'] == 'HEAD':
+        body = b''
+    return status, [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers.items()], body
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            get_async_client()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if github is not None:
+                await github.aclose()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    """The ASGI application"""
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+    begin_request()
+    response = await dispatch(scope)
+    status, headers, body = finish(scope, response)
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import random
+import time
+
+import aiohttp
+from requests.structures import CaseInsensitiveDict
+
+from github_client import (GITHUB_BACKOFF_BASE, GITHUB_MAX_PAGES, GITHUB_MAX_RETRIES, GITHUB_MAX_RETRY_WAIT,
+                           GITHUB_PAGE_CONCURRENCY, GITHUB_POOL_SIZE, GITHUB_TIMEOUT, UpstreamError, cache_key,
+                           check_circuit, decode_json, is_retryable, parse_retry_after, raise_for_upstream,
+                           remaining_page_urls)
+from circuit_breaker import CircuitBreaker
+from instrumentation import metrics, record
+from rate_limit import BudgetExhausted, TokenPool
+from response_cache import CachedResponse, decode_entry
+
+class BufferedResponse(CachedResponse):
+    """An aiohttp response read in full, with the requests-style attributes the fetch_* functions use"""
+
+    def __init__(self, status_code, headers, body):
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self._body = body
+
+    def json(self):
+        return json.loads(self._body)
+
+class AsyncGitHubClient:
+    """Non-blocking counterpart of GitHubClient for the ASGI app, on a pooled aiohttp session.
+
+    Retries, backoff, the token pool, the circuit breaker and the response
+    cache behave as in GitHubClient, except that waits yield to the event
+    loop instead of blocking a thread. The session is bound to the event loop it is created
+    on, so create the client from a coroutine and aclose() it on shutdown.
+    """
+
+    def __init__(self, headers=None, pool_size=GITHUB_POOL_SIZE, timeout=GITHUB_TIMEOUT,
+                 max_retries=GITHUB_MAX_RETRIES, backoff_base=GITHUB_BACKOFF_BASE,
+                 max_retry_wait=GITHUB_MAX_RETRY_WAIT, page_concurrency=GITHUB_PAGE_CONCURRENCY, cache=None,
+                 token_pool=None, breaker=None):
+        self.cache = cache
+        self.token_pool = token_pool or TokenPool([])
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_retry_wait = max_retry_wait
+        self.session = aiohttp.ClientSession(
+            headers=headers, timeout=aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout),
+            connector=aiohttp.TCPConnector(limit=pool_size))
+        self._pages = asyncio.Semaphore(page_concurrency)
+
+    async def aclose(self):
+        await self.session.close()
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff delay for the given attempt"""
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    async def acquire(self):
+        """Reserve a token, sleeping on the loop until the earliest reset when it is within the pool's max_wait"""
+        deadline = time.time() + self.token_pool.max_wait
+        while True:
+            try:
+                return self.token_pool.acquire(block=False)
+            except BudgetExhausted as exc:
+                if exc.retry_after is None or time.time() + exc.retry_after > deadline:
+                    raise UpstreamError(str(exc), 429, exc.retry_after)
+                await asyncio.sleep(max(exc.retry_after, 0.01))
+
+    async def get(self, url, params=None, headers=None, project=None):
+        """GET a GitHub API URL through the response cache, like GitHubClient.get"""
+        if self.cache is None:
+            response = await self.send(url, params, headers)
+            if response.status_code == 200 and project is not None:
+                return CachedResponse(decode_entry(response, project))
+            return response
+
+        key = cache_key(url, params, project)
+        entry, fresh = self.cache.lookup(key)
+        if fresh:
+            self.cache.count('hits')
+            return CachedResponse(entry)
+        if entry is not None:
+            headers = {**(headers or {}), **entry.validators()}
+
+        response = await self.send(url, params, headers)
+        if response.status_code == 304 and entry is not None:
+            self.cache.count('revalidations')
+            self.cache.refresh(key, entry)
+            return CachedResponse(entry)
+        self.cache.count('misses')
+        if response.status_code == 200:
+            return CachedResponse(self.cache.store(key, response, project))
+        return response
+
+    async def get_page(self, url, project=None):
+        async with self._pages:
+            return await self.get(url, project=project)
+
+    async def get_all_pages(self, url, project=None, max_pages=GITHUB_MAX_PAGES):
+        """Fetch every page of a list endpoint and merge the items in order; None when the first page is a 404"""
+        response = await self.get(url, project=project)
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise_for_upstream(response)
+
+        pages = [response]
+        urls = remaining_page_urls(response, max_pages)
+        if urls:
+            pages.extend(await asyncio.gather(*(self.get_page(url, project) for url in urls)))
+
+        items = []
+        for page in pages:
+            if page.status_code != 200:
+                raise_for_upstream(page)
+            items.extend(decode_json(page))
+        return items
+
+    async def send(self, url, params=None, headers=None, body=None):
+        """GET a GitHub API URL, or POST body as JSON when given, retrying transient failures like GitHubClient.send"""
+        check_circuit(self.breaker)
+        attempt = 0
+        while True:
+            budget = await self.acquire()
+            request_headers = dict(headers or {})
+            if budget.token:
+                request_headers['Authorization'] = f'token {budget.token}'
+
+            start = time.perf_counter()
+            response = None
+            try:
+                async with self.session.request('GET' if body is None else 'POST', url, params=params, json=body,
+                                                headers=request_headers) as raw:
+                    response = BufferedResponse(raw.status, raw.headers, await raw.read())
+            except (aiohttp.ClientError, asyncio.TimeoutError) as exc:
+                metrics.count_upstream('error')
+                error = UpstreamError(f'GitHub request failed: {exc}')
+                delay = self.backoff(attempt)
+            else:
+                record('github_http', time.perf_counter() - start)
+                metrics.count_upstream(response.status_code)
+                if not is_retryable(response):
+                    self.breaker.record_success()
+                    return response
+                retry_after = parse_retry_after(response)
+                error = UpstreamError(f'GitHub API returned {response.status_code}',
+                                      response.status_code, retry_after)
+                if retry_after is not None:
+                    delay = retry_after + random.uniform(0, self.backoff_base)
+                else:
+                    delay = self.backoff(attempt)
+            finally:
+                # Also on cancellation, e.g. fetch_user_bundle dropping the repos/events fetches of a missing user
+                self.token_pool.release(budget, response.headers if response is not None else None)
+
+            if attempt >= self.max_retries or delay > self.max_retry_wait:
+                self.breaker.record_failure(error.retry_after)
+                raise error
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,175 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from github_client import UpstreamError
+from snapshot_cache import METRICS_STALE_TTL
+
+# Background refresh configuration
+BACKGROUND_REFRESH = os.environ.get('BACKGROUND_REFRESH', 'true').lower() in ('1', 'true', 'yes')  # Worker thread in app.py's server processes; never started on Vercel
+REFRESH_WATCHLIST = os.environ.get('REFRESH_WATCHLIST', '')  # Comma-separated logins always kept warm
+REFRESH_LEARN_THRESHOLD = int(os.environ.get('REFRESH_LEARN_THRESHOLD', '3'))  # Requests within the window that put a user on the watch list, 0 to disable
+REFRESH_LEARN_WINDOW = float(os.environ.get('REFRESH_LEARN_WINDOW', '3600'))  # Seconds
+REFRESH_MAX_WATCHED = int(os.environ.get('REFRESH_MAX_WATCHED', '100'))  # Learned users kept; the least recently requested are dropped
+REFRESH_AHEAD = float(os.environ.get('REFRESH_AHEAD', '0.8'))  # Refresh once a snapshot is this fraction of its TTL old
+REFRESH_INTERVAL = float(os.environ.get('REFRESH_INTERVAL', '5'))  # Seconds between checks when nothing is due
+REFRESH_RATE_LIMIT_FLOOR = int(os.environ.get('REFRESH_RATE_LIMIT_FLOOR', '500'))  # Calls left above the reserve before refreshes pause
+
+logger = logging.getLogger(__name__)
+
+def configured_watchlist():
+    return [login.strip().lower() for login in REFRESH_WATCHLIST.split(',') if login.strip()]
+
+class BackgroundRefresher:
+    """Keeps watched users' metrics snapshots fresh from a worker thread.
+
+    Users are watched when configured in REFRESH_WATCHLIST or once they are
+    requested REFRESH_LEARN_THRESHOLD times within REFRESH_LEARN_WINDOW.
+    Their snapshots are rebuilt once they reach REFRESH_AHEAD of the snapshot
+    TTL, so views rarely find them expired. A request that does find a stale
+    snapshot is answered from it and the user is queued ahead of the watch
+    list. Refreshes pause while the token pool is within
+    REFRESH_RATE_LIMIT_FLOOR calls of its reserve, or after a rate limit
+    response until GitHub's reset (and while the GitHub circuit breaker is
+    open), leaving the budget to live requests.
+
+    Until start() is called every method is a cheap no-op and stale
+    snapshots are never served, which is how the serverless entry point
+    uses it: there is no process to run the refresh after the response.
+    """
+
+    def __init__(self, refresh, snapshots, token_pool, watchlist=None, learn_threshold=REFRESH_LEARN_THRESHOLD,
+                 learn_window=REFRESH_LEARN_WINDOW, max_watched=REFRESH_MAX_WATCHED, ahead=REFRESH_AHEAD,
+                 interval=REFRESH_INTERVAL, rate_limit_floor=REFRESH_RATE_LIMIT_FLOOR, max_stale=METRICS_STALE_TTL):
+        self.refresh = refresh
+        self.snapshots = snapshots
+        self.token_pool = token_pool
+        self.configured = configured_watchlist() if watchlist is None else [login.lower() for login in watchlist]
+        self.learn_threshold = learn_threshold
+        self.learn_window = learn_window
+        self.max_watched = max_watched
+        self.ahead = ahead
+        self.interval = interval
+        self.rate_limit_floor = rate_limit_floor
+        self.max_stale = max_stale
+        self.paused_until = 0.0
+        self._learned = OrderedDict()  # login -> time last requested, least recent first
+        self._requests = {}  # login -> [window start, requests in window]
+        self._queued = OrderedDict()  # Stale hits waiting for a refresh, oldest first
+        self._retry_at = {}  # login -> time before which a failed refresh is not retried
+        self._cond = threading.Condition()
+        self._thread = None
+        self._counters = {'refreshed': 0, 'failed': 0}
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start the worker thread, once; returns whether it is running"""
+        if not BACKGROUND_REFRESH or self.snapshots.ttl <= 0:
+            return False
+        with self._cond:
+            if not self.running:
+                self._thread = threading.Thread(target=self.run, name='metrics-refresh', daemon=True)
+                self._thread.start()
+        return True
+
+    def lookup(self, login):
+        """Snapshot for a request: fresh, or stale with a refresh queued while the worker runs; else None"""
+        if not self.running:
+            return self.snapshots.get(login)
+        self.seen(login)
+        snapshot, fresh = self.snapshots.lookup(login, self.max_stale)
+        if snapshot is not None and not fresh:
+            with self._cond:
+                self._queued[login] = None
+                self._cond.notify()
+        return snapshot
+
+    def seen(self, login):
+        """Count a request for login, watching it once it passes the learn threshold"""
+        if self.learn_threshold <= 0:
+            return
+        now = time.time()
+        with self._cond:
+            if login in self._learned:
+                self._learned[login] = now
+                self._learned.move_to_end(login)
+                return
+            window = self._requests.get(login)
+            if window is None or now - window[0] > self.learn_window:
+                window = self._requests[login] = [now, 0]
+            window[1] += 1
+            if window[1] >= self.learn_threshold:
+                del self._requests[login]
+                self._learned[login] = now
+                while len(self._learned) > self.max_watched:
+                    self._learned.popitem(last=False)
+            elif len(self._requests) > self.max_watched * 10:
+                # Forget expired windows so one-off lookups cannot grow this without bound
+                self._requests = {key: value for key, value in self._requests.items()
+                                  if now - value[0] <= self.learn_window}
+
+    def watched(self):
+        with self._cond:
+            return list(dict.fromkeys(self.configured + list(self._learned)))
+
+    def next_due(self):
+        """The queued stale user, else the watched user whose snapshot is oldest past REFRESH_AHEAD"""
+        now = time.time()
+        with self._cond:
+            while self._queued:
+                login = self._queued.popitem(last=False)[0]
+                if self._retry_at.get(login, 0) <= now:
+                    return login
+        oldest, oldest_age = None, self.snapshots.ttl * self.ahead
+        for login in self.watched():
+            if self._retry_at.get(login, 0) > now:
+                continue
+            age = self.snapshots.age(login)
+            if age is None:
+                return login
+            if age >= oldest_age:
+                oldest, oldest_age = login, age
+        return oldest
+
+    def has_budget(self):
+        if time.time() < self.paused_until:
+            return False
+        return self.token_pool.headroom() > self.rate_limit_floor
+
+    def run(self):
+        while True:
+            login = self.next_due() if self.has_budget() else None
+            if login is None:
+                with self._cond:
+                    self._cond.wait(self.interval)
+                continue
+            succeeded = False
+            try:
+                succeeded = self.refresh(login) is not None
+            except UpstreamError as error:
+                if error.retry_later:
+                    self.paused_until = time.time() + (error.retry_after or self.interval)
+            except Exception:
+                logger.exception('Background refresh of %s failed', login)
+            self._counters['refreshed' if succeeded else 'failed'] += 1
+            if succeeded:
+                self._retry_at.pop(login, None)
+            else:
+                # Unknown or failing users would otherwise be retried on every pass
+                self._retry_at[login] = time.time() + max(self.snapshots.ttl, self.interval)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'running': self.running,
+                'configured': len(self.configured),
+                'learned': len(self._learned),
+                'queued': len(self._queued),
+                'paused': self.running and not self.has_budget(),
+                **self._counters
+            }
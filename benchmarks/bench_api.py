@@ -0,0 +1,165 @@
+"""Measure API latency and throughput offline against the stub GitHub server.
+
+Starts benchmarks/github_stub.py in-process, points GITHUB_API_URL at it and
+drives /api/user and /api/generate-readme through the Flask test client for
+each user size, then times every calculate_* function on the same fixtures.
+Caches are disabled unless --warm is given, so every request does the full
+fetch-and-compute. Results are written as JSON for comparison across commits.
+
+Usage: python benchmarks/bench_api.py [--sizes 0 10 100 1000] [--requests 50] [--concurrency 4]
+                                      [--latency 0] [--backend rest|graphql] [--warm] [--output bench_api.json]
+"""
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from github_stub import start_stub, synthetic_fixture
+from records import event_record, repo_record
+
+ENDPOINTS = {
+    'user': '/api/user/{login}',
+    'generate-readme': '/api/generate-readme/{login}?template=default'
+}
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def load_app(stub_url, warm, backend):
+    """Import the Vercel entry point configured against the stub"""
+    os.environ['GITHUB_API_URL'] = stub_url
+    os.environ['GITHUB_FETCH_BACKEND'] = backend
+    if not warm:
+        os.environ['GITHUB_CACHE_BACKEND'] = 'none'
+        os.environ['METRICS_SNAPSHOT_TTL'] = '0'
+        os.environ['README_RENDER_CACHE_SIZE'] = '0'
+    from api import index
+    return index
+
+def run_endpoint(app, path_template, size, args, counter):
+    """Issue args.requests requests; cold runs use a fresh login each time to defeat coalescing"""
+    local = threading.local()
+
+    def one_request(_):
+        if not hasattr(local, 'client'):
+            local.client = app.test_client()
+        login = f'bench-{size}-{size}' if args.warm else f'bench-{size}-{size}-{next(counter)}'
+        start = time.perf_counter()
+        response = local.client.get(path_template.format(login=login))
+        elapsed = time.perf_counter() - start
+        if response.status_code != 200:
+            raise RuntimeError(f'{path_template} returned {response.status_code}')
+        return elapsed
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one_request, range(min(args.concurrency, args.requests))))  # Warm connections
+        start = time.perf_counter()
+        latencies = list(pool.map(one_request, range(args.requests)))
+        wall = time.perf_counter() - start
+
+    return {
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'rps': args.requests / wall
+    }
+
+def time_functions(core, size, repeat):
+    """Median milliseconds per call for each calculate_* function on one fixture"""
+    fixture = synthetic_fixture(f'bench-{size}-{size}')
+    user_data = fixture['user']
+    repos = [repo_record(repo) for repo in fixture['repos']]
+    events = [event_record(event) for event in fixture['events']]
+    contributions = core.calculate_contribution_stats(events)
+    functions = {
+        'calculate_language_stats': lambda: core.calculate_language_stats(repos),
+        'calculate_activity_stats': lambda: core.calculate_activity_stats(events),
+        'calculate_contribution_stats': lambda: core.calculate_contribution_stats(events),
+        'analyze_activity_times': lambda: core.analyze_activity_times(events),
+        'streak_summary': lambda: core.streak_summary({event.day for event in events}),
+        'calculate_achievements': lambda: core.calculate_achievements(user_data, repos, events, contributions),
+        'aggregate_events': lambda: core.aggregate_events(events)
+    }
+    timings = {}
+    for name, func in functions.items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - start)
+        timings[name] = statistics.median(samples) * 1000
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[0, 10, 100, 1000],
+                        help='repositories and events per synthetic user')
+    parser.add_argument('--requests', type=int, default=50)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0, help='stub latency per upstream call, ms')
+    parser.add_argument('--jitter', type=float, default=0, help='+/- stub latency jitter, ms')
+    parser.add_argument('--repeat', type=int, default=20, help='calls per calculate_* timing')
+    parser.add_argument('--backend', choices=['rest', 'graphql'], default='rest', help='GITHUB_FETCH_BACKEND')
+    parser.add_argument('--warm', action='store_true', help='keep caches on and reuse one login per size')
+    parser.add_argument('--output', default='bench_api.json')
+    args = parser.parse_args()
+
+    server, stub_url = start_stub(args.latency / 1000, args.jitter / 1000)
+    index = load_app(stub_url, args.warm, args.backend)
+    import core  # Already imported, and configured, by the entry point
+    counter = itertools.count()
+
+    results = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'latency_ms': args.latency,
+            'jitter_ms': args.jitter,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'backend': args.backend,
+            'warm': args.warm
+        },
+        'endpoints': [],
+        'functions': []
+    }
+    for size in args.sizes:
+        for endpoint, path_template in ENDPOINTS.items():
+            result = run_endpoint(index.app, path_template, size, args, counter)
+            results['endpoints'].append({'endpoint': endpoint, 'size': size, **result})
+            print(f'{endpoint:>16} size {size:>5}  p50 {result["p50_ms"]:8.2f} ms  '
+                  f'p99 {result["p99_ms"]:8.2f} ms  {result["rps"]:8.1f} req/s')
+    for size in args.sizes:
+        timings = time_functions(core, size, args.repeat)
+        results['functions'].append({'size': size, 'median_ms': timings})
+        print(f'size {size:>5}  ' + '  '.join(f'{name} {ms:.3f}' for name, ms in timings.items()))
+    server.shutdown()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f'Wrote {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Load-test the threaded Flask app against the ASGI app, both backed by a slow stub GitHub API.
+
+Runs benchmarks/github_stub.py, the Flask app (threaded Werkzeug server) and
+asgi_app.py (uvicorn) as separate processes, each server in one process.
+For each concurrency level it keeps that many /api/user requests open for
+--duration seconds, each for a login never requested before, with caches
+off so every request does the full fetch-and-compute. It reports req/s,
+latency, the CPU the server process used, and the users in flight per CPU
+core: req/s times the unloaded latency (the median of a warm-up at
+concurrency 4), i.e. users being fetched and computed rather than queued,
+divided by the cores the server used. Run it on a machine with spare cores
+for the stub and the load generator, or they will skew the results.
+
+--connections sets GITHUB_POOL_SIZE for both servers and FETCH_WORKERS for
+the Flask app, whose fetches block a pool thread each.
+
+Usage: python benchmarks/bench_asgi.py [--concurrency 10 50 200 500] [--duration 5] [--latency 100]
+                                       [--connections 100] [--size 10 30] [--modes wsgi asgi]
+"""
+import argparse
+import asyncio
+import itertools
+import logging
+import math
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+STUB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'github_stub.py')
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Nothing listening on port {port}')
+
+def cpu_seconds(pid):
+    """User plus system CPU time of a process, from /proc"""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+def serve(mode, port):
+    """Run one server in this process until killed"""
+    sys.path.insert(0, ROOT)
+    if mode == 'asgi':
+        import uvicorn
+        uvicorn.run('asgi_app:app', host='127.0.0.1', port=port, log_level='warning', access_log=False)
+    else:
+        from werkzeug.serving import make_server
+        from api.index import app
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+        make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+
+def start_server(mode, stub_url, args):
+    port = free_port()
+    env = dict(os.environ, GITHUB_API_URL=stub_url, GITHUB_CACHE_BACKEND='none', METRICS_SNAPSHOT_TTL='0',
+               BACKGROUND_REFRESH='false', GITHUB_POOL_SIZE=str(args.connections),
+               FETCH_WORKERS=str(args.connections))
+    process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve', mode, '--port', str(port)],
+                               env=env, cwd=ROOT)
+    wait_for_port(port)
+    return process, f'http://127.0.0.1:{port}'
+
+async def load(base_url, concurrency, duration, logins):
+    """Keep concurrency requests open for duration seconds; returns (latencies, errors, elapsed)"""
+    latencies = []
+    errors = 0
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(base_url, connector=connector) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            nonlocal errors
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    async with client.get(f'/api/user/{next(logins)}') as response:
+                        await response.read()
+                        ok = response.status == 200
+                except aiohttp.ClientError:
+                    ok = False
+                if ok:
+                    latencies.append(time.perf_counter() - start)
+                else:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies, errors, time.perf_counter() - start
+
+def run_mode(mode, stub_url, args, counter):
+    process, base_url = start_server(mode, stub_url, args)
+    try:
+        logins = (f'bench-{args.size[0]}-{args.size[1]}-{mode}{n}' for n in counter)
+        # Warms up imports and connections, and measures the latency without queueing
+        warmup = asyncio.run(load(base_url, 4, 2, logins))[0]
+        unloaded = percentile(warmup, 50)
+        for concurrency in args.concurrency:
+            cpu_before = cpu_seconds(process.pid)
+            latencies, errors, elapsed = asyncio.run(load(base_url, concurrency, args.duration, logins))
+            cores = (cpu_seconds(process.pid) - cpu_before) / elapsed
+            rps = len(latencies) / elapsed
+            in_flight = rps * unloaded
+            print(f'{mode:>5} concurrency {concurrency:>4}  {rps:7.1f} req/s  '
+                  f'p50 {percentile(latencies, 50) * 1000 if latencies else 0:7.0f} ms  '
+                  f'p99 {percentile(latencies, 99) * 1000 if latencies else 0:7.0f} ms  errors {errors:>4}  '
+                  f'cpu {cores:4.2f} cores  {rps / cores if cores else 0:7.1f} req/s/core  '
+                  f'{in_flight / cores if cores else 0:6.1f} in flight/core')
+    finally:
+        process.terminate()
+        process.wait()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 200, 500])
+    parser.add_argument('--duration', type=float, default=5, help='seconds per concurrency level')
+    parser.add_argument('--latency', type=float, default=100, help='stub latency per upstream call, ms')
+    parser.add_argument('--connections', type=int, default=100, help='upstream connections per server')
+    parser.add_argument('--size', type=int, nargs=2, default=[10, 30], metavar=('REPOS', 'EVENTS'))
+    parser.add_argument('--modes', nargs='+', choices=['wsgi', 'asgi'], default=['wsgi', 'asgi'])
+    parser.add_argument('--serve', choices=['wsgi', 'asgi'], help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve, args.port)
+
+    stub_port = free_port()
+    stub = subprocess.Popen([sys.executable, STUB, '--port', str(stub_port), '--latency', str(args.latency)],
+                            stdout=subprocess.DEVNULL)
+    try:
+        wait_for_port(stub_port)
+        counter = itertools.count()
+        for mode in args.modes:
+            run_mode(mode, f'http://127.0.0.1:{stub_port}', args, counter)
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+"""Compare the four per-metric event walks against the fused single-pass aggregator.
+
+Usage: python benchmarks/bench_event_analytics.py [--events 300 10000] [--repeat 20]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from core import analyze_activity_times, calculate_activity_stats, calculate_contribution_stats
+from event_analytics import aggregate_events, streak_summary
+from records import event_record
+
+EVENT_TYPES = ['PushEvent', 'PullRequestEvent', 'IssuesEvent', 'PullRequestReviewEvent',
+               'WatchEvent', 'CreateEvent', 'IssueCommentEvent', 'ForkEvent']
+
+def make_events(count, seed=42):
+    """Synthetic Event records spread over the last ~90 days, newest first like the API"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    events = []
+    for i in range(count):
+        created_at = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+        event_type = rng.choice(EVENT_TYPES)
+        payload = {'commits': [{}] * rng.randint(1, 5)} if event_type == 'PushEvent' else {}
+        events.append({'id': str(i), 'type': event_type, 'payload': payload,
+                       'created_at': created_at.strftime('%Y-%m-%dT%H:%M:%SZ')})
+    events.sort(key=lambda e: e['created_at'], reverse=True)
+    return [event_record(event) for event in events]
+
+def separate(events):
+    return {
+        'activity': calculate_activity_stats(events),
+        'contributions': calculate_contribution_stats(events),
+        'activity_times': analyze_activity_times(events),
+        'streak': streak_summary({event.day for event in events})
+    }
+
+def best_of(func, events, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(events)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, nargs='+', default=[300, 10000])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    for count in args.events:
+        events = make_events(count)
+        assert separate(events) == aggregate_events(events), 'fused output differs from the original functions'
+        before = best_of(separate, events, args.repeat)
+        after = best_of(aggregate_events, events, args.repeat)
+        print(f'{count:>7} events  separate {before * 1000:8.2f} ms  fused {after * 1000:8.2f} ms  '
+              f'speedup {before / after:5.1f}x')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Overload the Flask app against a slow stub GitHub API, with and without admission control.
+
+Runs benchmarks/github_stub.py and the Flask app (threaded Werkzeug server,
+as in bench_asgi.py) as separate processes, then keeps --concurrency
+/api/user requests open for --duration seconds, each for a login never
+requested before, so every request needs GitHub. With admission control
+off (ADMISSION_MAX_ACTIVE=0, REQUEST_DEADLINE=0) every request waits its
+turn on the fetch pool; with it on, the excess is shed with 503 and
+Retry-After and each request gives up on GitHub at REQUEST_DEADLINE. For
+each mode it reports served and shed requests per second and the latency of
+each, which should stay bounded with admission control on.
+
+Usage: python benchmarks/bench_overload.py [--concurrency 100] [--duration 10] [--latency 500]
+                                           [--max-active 16] [--queue 32] [--queue-timeout 2] [--deadline 5]
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from bench_asgi import STUB, free_port, percentile, wait_for_port
+
+def start_server(stub_url, admission, args):
+    port = free_port()
+    env = dict(os.environ, GITHUB_API_URL=stub_url, GITHUB_CACHE_BACKEND='none', METRICS_SNAPSHOT_TTL='0',
+               BACKGROUND_REFRESH='false', ADMISSION_MAX_ACTIVE=str(args.max_active if admission else 0),
+               ADMISSION_QUEUE_SIZE=str(args.queue), ADMISSION_QUEUE_TIMEOUT=str(args.queue_timeout),
+               REQUEST_DEADLINE=str(args.deadline if admission else 0))
+    bench_asgi = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_asgi.py')
+    process = subprocess.Popen([sys.executable, bench_asgi, '--serve', 'wsgi', '--port', str(port)], env=env)
+    wait_for_port(port)
+    return process, f'http://127.0.0.1:{port}'
+
+async def load(base_url, concurrency, duration, logins):
+    """Keep concurrency requests open for duration seconds; returns ({status: [latencies]}, elapsed)"""
+    by_status = {}
+    timeout = aiohttp.ClientTimeout(total=duration * 10)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(base_url, connector=connector, timeout=timeout) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker():
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    async with client.get(f'/api/user/{next(logins)}') as response:
+                        await response.read()
+                        status = response.status
+                except (aiohttp.ClientError, asyncio.TimeoutError):
+                    status = 'error'
+                by_status.setdefault(status, []).append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return by_status, time.perf_counter() - start
+
+def report(mode, by_status, elapsed):
+    parts = []
+    for status, latencies in sorted(by_status.items(), key=lambda item: str(item[0])):
+        parts.append(f'{status}: {len(latencies) / elapsed:6.1f}/s p50 {percentile(latencies, 50) * 1000:6.0f} ms '
+                     f'p99 {percentile(latencies, 99) * 1000:6.0f} ms')
+    print(f'admission {mode:>3}  ' + '  '.join(parts))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per mode')
+    parser.add_argument('--latency', type=float, default=500, help='stub latency per upstream call, ms')
+    parser.add_argument('--size', type=int, nargs=2, default=[10, 30], metavar=('REPOS', 'EVENTS'))
+    parser.add_argument('--max-active', type=int, default=16, help='ADMISSION_MAX_ACTIVE')
+    parser.add_argument('--queue', type=int, default=32, help='ADMISSION_QUEUE_SIZE')
+    parser.add_argument('--queue-timeout', type=float, default=2, help='ADMISSION_QUEUE_TIMEOUT, seconds')
+    parser.add_argument('--deadline', type=float, default=5, help='REQUEST_DEADLINE, seconds')
+    parser.add_argument('--modes', nargs='+', choices=['off', 'on'], default=['off', 'on'])
+    args = parser.parse_args()
+
+    stub_port = free_port()
+    stub = subprocess.Popen([sys.executable, STUB, '--port', str(stub_port), '--latency', str(args.latency)],
+                            stdout=subprocess.DEVNULL)
+    counter = itertools.count()
+    try:
+        wait_for_port(stub_port)
+        for mode in args.modes:
+            process, base_url = start_server(f'http://127.0.0.1:{stub_port}', mode == 'on', args)
+            try:
+                logins = (f'bench-{args.size[0]}-{args.size[1]}-{mode}{n}' for n in counter)
+                report(mode, *asyncio.run(load(base_url, args.concurrency, args.duration, logins)))
+            finally:
+                process.terminate()
+                process.wait()
+    finally:
+        stub.terminate()
+        stub.wait()
+
+if __name__ == '__main__':
+    main()
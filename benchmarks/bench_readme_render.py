@@ -0,0 +1,63 @@
+"""Measure README renders per second for each template, uncached and memoized.
+
+Usage: python benchmarks/bench_readme_render.py [--users 200] [--seconds 1.0]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from readme_renderer import README_TEMPLATES, ReadmeRenderer
+
+LANGUAGES = ['Python', 'JavaScript', 'Go', 'Rust', 'TypeScript', 'C', 'C++', 'Java', 'Ruby', 'Shell']
+
+def make_inputs(count, seed=42):
+    """Synthetic render inputs for count distinct users"""
+    rng = random.Random(seed)
+    inputs = []
+    for i in range(count):
+        user_data = {
+            'login': f'user{i}', 'name': f'User {i}', 'bio': 'Building things', 'location': 'Earth',
+            'company': 'Example', 'blog': 'https://example.com', 'twitter_username': f'user{i}',
+            'public_repos': rng.randint(0, 300), 'followers': rng.randint(0, 5000), 'following': rng.randint(0, 500),
+        }
+        languages = {lang: rng.randint(1, 40) for lang in rng.sample(LANGUAGES, rng.randint(1, len(LANGUAGES)))}
+        extras = {
+            'contributions': {'total_contributions': rng.randint(0, 500)},
+            'streak': {'current_streak': rng.randint(0, 30), 'longest_streak': rng.randint(0, 90)},
+            'achievements': [{'name': 'Popular', 'description': '100+ followers', 'icon': '⭐'}] * rng.randint(0, 6),
+        }
+        # Stands in for the snapshot digest the server keys the memo on
+        extras['key'] = f'user{i}'
+        inputs.append((user_data, languages, rng.randint(0, 10000), rng.randint(0, 1000), extras))
+    return inputs
+
+def renders_per_second(renderer, template, inputs, seconds):
+    renders = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        for user_data, languages, stars, forks, extras in inputs:
+            renderer.render(template, user_data, languages, stars, forks, **extras)
+        renders += len(inputs)
+    return renders / (time.perf_counter() - start)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--seconds', type=float, default=1.0)
+    args = parser.parse_args()
+
+    inputs = make_inputs(args.users)
+    uncached = ReadmeRenderer(cache_size=0)
+    memoized = ReadmeRenderer(cache_size=args.users * len(README_TEMPLATES))
+    for template in README_TEMPLATES:
+        cold = renders_per_second(uncached, template, inputs, args.seconds)
+        warm = renders_per_second(memoized, template, inputs, args.seconds)
+        print(f'{template:>9}  uncached {cold:10,.0f} renders/s  memoized {warm:10,.0f} renders/s')
+
+if __name__ == '__main__':
+    main()
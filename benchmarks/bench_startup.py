@@ -0,0 +1,88 @@
+"""Measure cold-start cost: interpreter start, entry point import and the first response, in fresh processes.
+
+Each sample runs a new Python process that imports the entry point and
+serves one request through the Flask test client against the stub GitHub
+API, as a serverless function does on a cold start. The import time, the
+time to the first response, and the wall time of the whole process are
+reported as medians per path. --importtime also lists the slowest imports
+of one cold start (python -X importtime).
+
+Usage: python benchmarks/bench_startup.py [--entry api.index] [--samples 10] [--latency 0]
+                                          [--paths / /api/user/bench-10-30 ...] [--importtime 15]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from github_stub import start_stub
+
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+import importlib
+module = importlib.import_module(sys.argv[1])
+imported = time.perf_counter()
+response = module.app.test_client().get(sys.argv[2])
+responded = time.perf_counter()
+print(json.dumps({'status': response.status_code, 'import': imported - start, 'first_response': responded - imported}))
+'''
+
+def cold_start(entry, path, env):
+    """One fresh process; returns its import and first-response seconds and its wall time"""
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', CHILD, entry, path], env=env, cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    result = json.loads(output.splitlines()[-1])
+    if result['status'] != 200:
+        raise RuntimeError(f'{path} returned {result["status"]}')
+    result['process'] = time.perf_counter() - start
+    return result
+
+def slowest_imports(entry, env, count):
+    """(cumulative microseconds, module) of the slowest top-level imports of one cold start"""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {entry}'], env=env, cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        # Two-space indent marks modules imported directly by the entry point's import
+        if name.startswith('   ') and not name.startswith('     '):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entry', default='api.index', help='module exposing the Flask app')
+    parser.add_argument('--samples', type=int, default=10, help='cold starts per path')
+    parser.add_argument('--latency', type=float, default=0, help='stub latency per upstream call, ms')
+    parser.add_argument('--paths', nargs='+', default=['/', '/api/user/bench-10-30',
+                                                       '/api/generate-readme/bench-10-30',
+                                                       '/api/user/bench-10-30/activity'])
+    parser.add_argument('--importtime', type=int, default=15, help='slowest imports to list, 0 for none')
+    args = parser.parse_args()
+
+    server, stub_url = start_stub(args.latency / 1000)
+    env = dict(os.environ, GITHUB_API_URL=stub_url, GITHUB_CACHE_BACKEND='none', PYTHONDONTWRITEBYTECODE='1')
+    for path in args.paths:
+        samples = [cold_start(args.entry, path, env) for _ in range(args.samples)]
+        median = {key: statistics.median(sample[key] for sample in samples) * 1000
+                  for key in ('import', 'first_response', 'process')}
+        print(f'{path:<40} import {median["import"]:7.1f} ms  first response {median["first_response"]:7.1f} ms  '
+              f'process {median["process"]:7.1f} ms')
+    if args.importtime:
+        print(f'Slowest imports of {args.entry} (cumulative):')
+        for micros, name in slowest_imports(args.entry, env, args.importtime):
+            print(f'  {micros / 1000:7.1f} ms  {name}')
+    server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Compare the per-event Python activity walks against the NumPy-backed vector_analytics.
+
+Checks that top hours and streaks match analyze_activity_times and
+event_analytics.streak_summary, then times both, with and without building the epoch
+array, plus the full 24x7 heatmap and per-day counts.
+
+Usage: python benchmarks/bench_vector_analytics.py [--events 300 10000 100000] [--repeat 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from core import analyze_activity_times
+from bench_event_analytics import make_events
+from event_analytics import streak_summary
+from vector_analytics import (activity_profile, daily_counts, epoch_array, heatmap, local_today, streaks,
+                              top_hours)
+
+def python_walks(events):
+    return analyze_activity_times(events), streak_summary({event.day for event in events})
+
+def vector_walks(epochs):
+    active_days, _ = daily_counts(epochs)
+    return top_hours(epochs), streaks(active_days, local_today())
+
+def best_of(func, arg, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--events', type=int, nargs='+', default=[300, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    for count in args.events:
+        events = make_events(count)
+        profile = activity_profile(events)
+        assert profile['top_hours'] == analyze_activity_times(events), 'top hours differ'
+        assert profile['streak'] == streak_summary({event.day for event in events}), 'streaks differ'
+
+        epochs = epoch_array(events)
+        python = best_of(python_walks, events, args.repeat)
+        convert = best_of(epoch_array, events, args.repeat)
+        vector = best_of(vector_walks, epochs, args.repeat)
+        grid = best_of(heatmap, epochs, args.repeat)
+        full = best_of(activity_profile, events, args.repeat)
+        print(f'{count:>7} events  python {python * 1000:8.2f} ms  numpy {vector * 1000:7.2f} ms '
+              f'(+{convert * 1000:.2f} ms to build the array, {python / (vector + convert):5.1f}x)  '
+              f'heatmap {grid * 1000:6.2f} ms  full profile {full * 1000:7.2f} ms')
+
+if __name__ == '__main__':
+    main()
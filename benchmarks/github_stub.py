@@ -0,0 +1,355 @@
+"""Local stand-in for api.github.com serving recorded or synthetic fixtures.
+
+Logins of the form bench-<repos>-<events>[-<suffix>] get deterministic synthetic
+data of that size, e.g. bench-1000-300, and orgs named bench-org-<members>-<repos>
+list that many synthetic members and repos. Any other login is served from
+<fixtures>/<login>/{user,repos,events}.json when that directory exists, and is
+a 404 otherwise. /repos/<login>/<repo>/languages reports synthetic byte sizes
+per language for those repos. Responses carry ETag, Link and X-RateLimit-*
+headers like the real API, after an optional artificial latency.
+
+POST /graphql answers the two queries in graphql_backend.py (UserProfile and
+UserRepositories) from the same fixtures, with synthetic language byte sizes.
+It matches on the operation name and variables rather than parsing GraphQL,
+and unlike GitHub it does not require a token.
+
+Usage: python benchmarks/github_stub.py [--port 8001] [--latency 50] [--jitter 10] [--fixtures DIR]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+SYNTHETIC_LOGIN = re.compile(r'^bench-(\d+)-(\d+)(?:-[\w-]+)?$')
+SYNTHETIC_ORG = re.compile(r'^bench-org-(\d+)-(\d+)$')
+
+# Size of each member of a synthetic org
+ORG_MEMBER_REPOS = 5
+ORG_MEMBER_EVENTS = 30
+
+LANGUAGES = ['Python', 'JavaScript', 'Go', 'Rust', 'TypeScript', 'C', 'Java', 'Ruby', None]
+EVENT_TYPES = ['PushEvent', 'PullRequestEvent', 'IssuesEvent', 'PullRequestReviewEvent',
+               'WatchEvent', 'CreateEvent', 'IssueCommentEvent', 'ForkEvent']
+
+def make_user(login, repo_count):
+    return {
+        'login': login, 'id': int(hashlib.sha1(login.encode()).hexdigest()[:8], 16), 'name': login.replace('-', ' ').title(),
+        'avatar_url': f'https://avatars.githubusercontent.com/{login}', 'bio': 'Benchmark fixture',
+        'location': 'Localhost', 'company': 'Stub', 'blog': 'https://example.com', 'twitter_username': login,
+        'followers': repo_count * 3, 'following': 42, 'public_repos': repo_count,
+        'created_at': '2015-06-01T12:00:00Z', 'updated_at': '2024-01-01T00:00:00Z'
+    }
+
+# URL templates every real repository object carries
+REPO_URL_FIELDS = ('archive', 'assignees', 'blobs', 'branches', 'collaborators', 'comments', 'commits', 'compare',
+                   'contents', 'contributors', 'deployments', 'downloads', 'events', 'forks', 'git_commits',
+                   'git_refs', 'git_tags', 'hooks', 'issue_comment', 'issue_events', 'issues', 'keys', 'labels',
+                   'languages', 'merges', 'milestones', 'notifications', 'pulls', 'releases', 'stargazers',
+                   'statuses', 'subscribers', 'subscription', 'tags', 'teams', 'trees')
+
+def make_owner(login):
+    api = f'https://api.github.com/users/{login}'
+    return {'login': login, 'id': 1, 'type': 'User', 'site_admin': False, 'url': api,
+            'html_url': f'https://github.com/{login}', 'avatar_url': f'https://avatars.githubusercontent.com/{login}',
+            **{f'{name}_url': f'{api}/{name}' for name in ('followers', 'following', 'gists', 'starred',
+                                                          'subscriptions', 'organizations', 'repos', 'events')}}
+
+def make_repos(login, count, seed=42):
+    """Repositories shaped like the real list endpoint, including fields the app drops"""
+    rng = random.Random(seed)
+    owner = make_owner(login)
+    return [{
+        'id': i, 'name': f'repo-{i}', 'full_name': f'{login}/repo-{i}', 'private': False, 'owner': owner,
+        **{f'{name}_url': f'https://api.github.com/repos/{login}/repo-{i}/{name}' for name in REPO_URL_FIELDS},
+        'html_url': f'https://github.com/{login}/repo-{i}', 'description': 'x' * rng.randint(0, 120),
+        'fork': rng.random() < 0.2, 'language': rng.choice(LANGUAGES), 'archived': rng.random() < 0.05,
+        'stargazers_count': int(rng.paretovariate(1.2)) - 1, 'watchers_count': 0,
+        'forks_count': int(rng.paretovariate(1.5)) - 1, 'size': rng.randint(0, 50000),
+        'created_at': '2018-01-01T00:00:00Z', 'updated_at': '2024-01-01T00:00:00Z',
+        'pushed_at': f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T00:00:00Z',
+        'topics': ['benchmark'], 'default_branch': 'main', 'open_issues_count': rng.randint(0, 20)
+    } for i in range(count)]
+
+def make_events(count, seed=42, login='bench'):
+    """Events over the last ~90 days, newest first like the API, with full actor and commit payloads"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    actor = {'id': 1, 'login': login, 'display_login': login, 'gravatar_id': '',
+             'url': f'https://api.github.com/users/{login}',
+             'avatar_url': f'https://avatars.githubusercontent.com/{login}'}
+    events = []
+    for i in range(count):
+        created_at = now - timedelta(seconds=rng.randint(0, 90 * 86400))
+        event_type = rng.choice(EVENT_TYPES)
+        repo_name = f'{login}/repo-{rng.randint(0, 50)}'
+        payload = {}
+        if event_type == 'PushEvent':
+            payload = {'push_id': i, 'size': 0, 'ref': 'refs/heads/main', 'head': '0' * 40, 'before': '1' * 40,
+                       'commits': [{'sha': f'{i:040x}', 'distinct': True, 'message': 'Update benchmark fixture ' * 3,
+                                    'author': {'email': f'{login}@example.com', 'name': login},
+                                    'url': f'https://api.github.com/repos/{repo_name}/commits/{i:040x}'}
+                                   for _ in range(rng.randint(1, 5))]}
+            payload['size'] = len(payload['commits'])
+        events.append({'id': None, 'type': event_type, 'actor': actor, 'public': True,
+                       'repo': {'id': i, 'name': repo_name, 'url': f'https://api.github.com/repos/{repo_name}'},
+                       'payload': payload, 'created_at': created_at.strftime('%Y-%m-%dT%H:%M:%SZ')})
+    events.sort(key=lambda e: e['created_at'], reverse=True)
+    # Like GitHub's, ids grow with time, so the newest event has the highest id
+    for index, event in enumerate(events):
+        event['id'] = str(10 ** 10 + count - index)
+    return events
+
+def synthetic_fixture(login):
+    """Fixture for a bench-<repos>-<events> login, or None for any other login"""
+    match = SYNTHETIC_LOGIN.match(login)
+    if not match:
+        return None
+    repo_count, event_count = int(match.group(1)), int(match.group(2))
+    return {
+        'user': make_user(login, repo_count),
+        'repos': make_repos(login, repo_count),
+        'events': make_events(event_count, login=login)
+    }
+
+def synthetic_org(org):
+    """Members and repos for a bench-org-<members>-<repos> org, or None for any other org"""
+    match = SYNTHETIC_ORG.match(org)
+    if not match:
+        return None
+    member_count, repo_count = int(match.group(1)), int(match.group(2))
+    return {
+        'members': [{'login': f'bench-{ORG_MEMBER_REPOS}-{ORG_MEMBER_EVENTS}-{org}-m{i}', 'id': i, 'type': 'User'}
+                    for i in range(member_count)],
+        'repos': make_repos(org, repo_count)
+    }
+
+GRAPHQL_OPERATION = re.compile(r'\bquery\s+(\w+)')
+
+def repo_languages(repo):
+    """Synthetic bytes per language for a REST-shaped repo: its primary language plus a smaller second one"""
+    if not repo.get('language'):
+        return {}
+    size = (repo.get('size') or 0) * 1024
+    sizes = {repo['language']: size * 7 // 10}
+    second = LANGUAGES[repo.get('id', 0) % (len(LANGUAGES) - 1)]
+    sizes[second] = sizes.get(second, 0) + size * 3 // 10
+    return dict(sorted(sizes.items(), key=lambda item: item[1], reverse=True))
+
+def graphql_repositories(repos, variables):
+    """A repositories connection page, with the cursor as the offset of the next repo"""
+    offset = int(variables.get('cursor') or 0)
+    page = repos[offset:offset + min(variables['repos'], 100)]
+    return {
+        'totalCount': len(repos),
+        'pageInfo': {'hasNextPage': offset + len(page) < len(repos), 'endCursor': str(offset + len(page))},
+        'nodes': [{
+            'name': repo['name'], 'nameWithOwner': repo['full_name'],
+            'stargazerCount': repo.get('stargazers_count', 0), 'forkCount': repo.get('forks_count', 0),
+            'isFork': repo.get('fork', False), 'isArchived': repo.get('archived', False),
+            'pushedAt': repo.get('pushed_at'),
+            'primaryLanguage': {'name': repo['language']} if repo.get('language') else None,
+            'languages': {'edges': [{'size': size, 'node': {'name': name}} for name, size
+                                    in list(repo_languages(repo).items())[:variables['languages']]]}
+        } for repo in page]
+    }
+
+def graphql_user(fixture, operation, variables):
+    repositories = graphql_repositories(fixture['repos'], variables)
+    if operation == 'UserRepositories':
+        return {'repositories': repositories}
+    user = fixture['user']
+    return {
+        'login': user['login'], 'name': user.get('name'), 'avatarUrl': user.get('avatar_url'),
+        'bio': user.get('bio'), 'location': user.get('location'), 'company': user.get('company'),
+        'websiteUrl': user.get('blog') or None, 'twitterUsername': user.get('twitter_username'),
+        'createdAt': user.get('created_at'),
+        'followers': {'totalCount': user.get('followers', 0)},
+        'following': {'totalCount': user.get('following', 0)},
+        'repositories': repositories,
+        'contributionsCollection': {'contributionCalendar': {'totalContributions': len(fixture['events'])}}
+    }
+
+def load_fixture(fixtures_dir, login):
+    """Recorded responses saved as <fixtures_dir>/<login>/{user,repos,events}.json"""
+    path = os.path.join(fixtures_dir, login)
+    if not os.path.isfile(os.path.join(path, 'user.json')):
+        return None
+    fixture = {}
+    for kind in ('user', 'repos', 'events'):
+        try:
+            with open(os.path.join(path, f'{kind}.json'), encoding='utf-8') as f:
+                fixture[kind] = json.load(f)
+        except FileNotFoundError:
+            fixture[kind] = []
+    return fixture
+
+class FixtureStore:
+    """Fixtures per login, built or loaded once and then served from memory"""
+
+    def __init__(self, fixtures_dir=FIXTURES_DIR):
+        self.fixtures_dir = fixtures_dir
+        self._fixtures = {}
+        self._lock = threading.Lock()
+
+    def get(self, login):
+        key = login.lower()
+        with self._lock:
+            if key not in self._fixtures:
+                self._fixtures[key] = synthetic_fixture(key) or load_fixture(self.fixtures_dir, login)
+            return self._fixtures[key]
+
+    def get_org(self, org):
+        key = f'org:{org.lower()}'
+        with self._lock:
+            if key not in self._fixtures:
+                self._fixtures[key] = synthetic_org(org.lower())
+            return self._fixtures[key]
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True  # Headers and body are separate writes; avoid delayed-ACK stalls
+
+    def log_message(self, format, *args):
+        pass
+
+    def delay(self):
+        server = self.server
+        if server.latency or server.jitter:
+            time.sleep(max(server.latency + random.uniform(-server.jitter, server.jitter), 0))
+
+    def do_GET(self):
+        server = self.server
+        self.delay()
+
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        parts = [part for part in url.path.split('/') if part]
+        if parts == ['rate_limit']:
+            return self.send_json(200, {'resources': {'core': self.rate_limit()}})
+        if len(parts) == 3 and parts[0] == 'orgs' and parts[2] in ('members', 'repos'):
+            fixture = server.store.get_org(parts[1])
+            if fixture is None:
+                return self.send_json(404, {'message': 'Not Found'})
+            return self.send_page(url, query, fixture[parts[2]])
+        if len(parts) == 4 and parts[0] == 'repos' and parts[3] == 'languages':
+            fixture = server.store.get(parts[1])
+            repo = next((repo for repo in fixture['repos'] if repo['name'] == parts[2]), None) if fixture else None
+            if repo is None:
+                return self.send_json(404, {'message': 'Not Found'})
+            return self.send_json(200, repo_languages(repo))
+        if len(parts) < 2 or parts[0] != 'users' or len(parts) > 3:
+            return self.send_json(404, {'message': 'Not Found'})
+
+        fixture = server.store.get(parts[1])
+        if fixture is None:
+            return self.send_json(404, {'message': 'Not Found'})
+        if len(parts) == 2:
+            return self.send_json(200, fixture['user'])
+        if parts[2] not in ('repos', 'events'):
+            return self.send_json(404, {'message': 'Not Found'})
+        return self.send_page(url, query, fixture[parts[2]])
+
+    def do_POST(self):
+        self.delay()
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if urlparse(self.path).path != '/graphql':
+            return self.send_json(404, {'message': 'Not Found'})
+        try:
+            payload = json.loads(body)
+            operation = GRAPHQL_OPERATION.search(payload['query']).group(1)
+            variables = payload.get('variables') or {}
+            login = variables['login']
+        except (ValueError, KeyError, AttributeError, TypeError):
+            return self.send_json(400, {'message': 'Problems parsing JSON'})
+
+        headers = {'X-RateLimit-Resource': 'graphql'}
+        fixture = self.server.store.get(login)
+        if fixture is None:
+            return self.send_json(200, {'data': {'user': None}, 'errors': [{
+                'type': 'NOT_FOUND', 'path': ['user'],
+                'message': f"Could not resolve to a User with the login of '{login}'."}]}, headers)
+        return self.send_json(200, {'data': {'user': graphql_user(fixture, operation, variables)}}, headers)
+
+    def send_page(self, url, query, items):
+        per_page = min(int(query.get('per_page', ['30'])[0]), 100)
+        page = max(int(query.get('page', ['1'])[0]), 1)
+        last = max(-(-len(items) // per_page), 1)
+        return self.send_json(200, items[(page - 1) * per_page:page * per_page],
+                              self.link_header(url.path, per_page, page, last))
+
+    def link_header(self, path, per_page, page, last):
+        if last == 1:
+            return {}
+        base = f'http://{self.headers["Host"]}{path}?per_page={per_page}&page='
+        links = []
+        if page < last:
+            links.append(f'<{base}{page + 1}>; rel="next"')
+            links.append(f'<{base}{last}>; rel="last"')
+        if page > 1:
+            links.append(f'<{base}1>; rel="first"')
+            links.append(f'<{base}{page - 1}>; rel="prev"')
+        return {'Link': ', '.join(links)}
+
+    def rate_limit(self):
+        return {'limit': 5000, 'remaining': 5000, 'used': 0, 'reset': int(time.time()) + 3600}
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if status == 200 and self.headers.get('If-None-Match') == etag:
+            status, body = 304, b''
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        rate_limit = self.rate_limit()
+        self.send_header('X-RateLimit-Limit', str(rate_limit['limit']))
+        self.send_header('X-RateLimit-Remaining', str(rate_limit['remaining']))
+        self.send_header('X-RateLimit-Reset', str(rate_limit['reset']))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+class StubServer(ThreadingHTTPServer):
+    # The default backlog of 5 drops connection bursts from pooled clients, stalling them on SYN retries
+    request_queue_size = 1024
+
+def start_stub(latency=0.0, jitter=0.0, fixtures_dir=FIXTURES_DIR, host='127.0.0.1', port=0):
+    """Serve the stub on a background thread; returns (server, base_url)"""
+    server = StubServer((host, port), StubHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.jitter = jitter
+    server.store = FixtureStore(fixtures_dir)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://{host}:{server.server_address[1]}'
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0, help='+/- milliseconds of random latency')
+    parser.add_argument('--fixtures', default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    server, url = start_stub(args.latency / 1000, args.jitter / 1000, args.fixtures, args.host, args.port)
+    print(f'Stub GitHub API on {url}  (export GITHUB_API_URL={url})')
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+import os
+import threading
+import time
+
+# Circuit breaker configuration
+GITHUB_BREAKER_THRESHOLD = int(os.environ.get('GITHUB_BREAKER_THRESHOLD', '5'))  # Consecutive failed GitHub calls that open the circuit, 0 to disable
+GITHUB_BREAKER_COOLDOWN = float(os.environ.get('GITHUB_BREAKER_COOLDOWN', '30'))  # Seconds the circuit stays open before a trial call
+
+class CircuitBreaker:
+    """Fails GitHub calls fast after repeated upstream failures instead of tying up workers on them.
+
+    A call counts as failed when it still cannot be served after its
+    retries: timeouts, connection errors, 5xx and rate limits. After
+    threshold consecutive failures the circuit opens for cooldown seconds,
+    or until GitHub's rate limit resets if that is later, and calls are
+    rejected without a request. Then one trial call is let through every
+    cooldown; the first call that succeeds closes the circuit.
+    """
+
+    def __init__(self, threshold=GITHUB_BREAKER_THRESHOLD, cooldown=GITHUB_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self._lock = threading.Lock()
+        self._counters = {'opened': 0, 'rejected': 0, 'trials': 0}
+
+    @property
+    def open(self):
+        return self.threshold > 0 and self.failures >= self.threshold
+
+    def check(self):
+        """Seconds until the next trial while the circuit is open and this call must not be made, else None"""
+        if not self.open:
+            return None
+        with self._lock:
+            if not self.open:
+                return None
+            now = time.time()
+            if now < self.open_until:
+                self._counters['rejected'] += 1
+                return self.open_until - now
+            # This call is the trial; the others keep failing fast for another cooldown unless it succeeds
+            self.open_until = now + self.cooldown
+            self._counters['trials'] += 1
+            return None
+
+    def record_success(self):
+        if self.failures:
+            with self._lock:
+                self.failures = 0
+
+    def record_failure(self, retry_after=None):
+        with self._lock:
+            self.failures += 1
+            if self.threshold > 0 and self.failures >= self.threshold:
+                if self.failures == self.threshold:
+                    self._counters['opened'] += 1
+                self.open_until = time.time() + max(self.cooldown, retry_after or 0)
+
+    def stats(self):
+        with self._lock:
+            return {'open': self.open, 'consecutive_failures': self.failures, **self._counters}
@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+from admission import ADMISSION_MAX_ACTIVE
+from instrumentation import submit_in_context
+
+# Upstream fetch pool configuration
+FETCH_CALLS_PER_USER = 3  # Profile, repos and events
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', '8'))  # Users computed at once across all batch requests
+# Enough for every admitted request and batch worker to have all its fetches running at once, so none queues
+# behind another's; without admission control nothing bounds the requests, so the pool stays small
+DEFAULT_FETCH_WORKERS = FETCH_CALLS_PER_USER * (ADMISSION_MAX_ACTIVE + BATCH_WORKERS) if ADMISSION_MAX_ACTIVE > 0 else 8
+FETCH_WORKERS = int(os.environ.get('FETCH_WORKERS', str(DEFAULT_FETCH_WORKERS)))  # Shared across all requests in the process
+
+_executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix='github-fetch')
+_batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch-user')
+
+def _submit(func, *args):
+    return submit_in_context(_executor, func, *args)
+
+def submit_user_fetches(username, fetch_user, fetch_repos, fetch_events):
+    """Start the profile, repos and events fetches for a user on the shared pool"""
+    return {
+        'user': _submit(fetch_user, username),
+        'repos': _submit(fetch_repos, username),
+        'events': _submit(fetch_events, username),
+    }
+
+def _split(source, index):
+    """Future for one element of another future's tuple result, or None when that result is None"""
+    part = Future()
+
+    def resolve(source):
+        if not part.set_running_or_notify_cancel():
+            return
+        if source.exception() is not None:
+            part.set_exception(source.exception())
+        else:
+            result = source.result()
+            part.set_result(None if result is None else result[index])
+
+    source.add_done_callback(resolve)
+    return part
+
+def submit_profile_fetches(username, fetch_profile, fetch_events):
+    """Like submit_user_fetches for a backend whose fetch_profile returns (user_data, repos) in one call"""
+    profile = _submit(fetch_profile, username)
+    return {
+        'user': _split(profile, 0),
+        'repos': _split(profile, 1),
+        'events': _submit(fetch_events, username),
+    }
+
+class SharedFetches:
+    """A user's fetch futures, shared by every request for that user while any of them is still running.
+
+    The first request for a login starts its fetches with submit; the
+    stream and snapshot builds arriving before those finish wait on the same
+    futures, so a burst of lookups for one user costs one set of GitHub
+    calls. A cancelled fetch drops the set, so later requests start afresh.
+    """
+
+    def __init__(self, submit):
+        self.submit = submit
+        self._lock = threading.Lock()
+        self._fetches = {}
+        self._counters = {'started': 0, 'shared': 0}
+
+    def get(self, username):
+        key = username.lower()
+        with self._lock:
+            futures = self._fetches.get(key)
+            if futures is not None:
+                self._counters['shared'] += 1
+                return futures
+            futures = self._fetches[key] = self.submit(username)
+            self._counters['started'] += 1
+        pending = [len(futures)]
+
+        def finished(future):
+            with self._lock:
+                pending[0] -= 1
+                if (pending[0] == 0 or future.cancelled()) and self._fetches.get(key) is futures:
+                    del self._fetches[key]
+
+        for future in futures.values():
+            future.add_done_callback(finished)
+        return futures
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._fetches)
+        return stats
+
+def result_by(future, deadline):
+    """A fetch future's result, waiting at most until deadline (a time.monotonic() value, None for no limit)"""
+    try:
+        return future.result(None if deadline is None else max(deadline - time.monotonic(), 0))
+    except CancelledError:
+        # A request sharing the fetch dropped it at its own deadline, which this one shares in effect
+        raise TimeoutError('The fetch was cancelled at a deadline')
+
+def cancel_pending(futures):
+    """Cancel the fetches that have not started; running ones finish and fill the response cache"""
+    for future in futures.values():
+        future.cancel()
+
+def gather_user_bundle(futures, timeout=None):
+    """Wait for the futures of a user's fetches.
+
+    Returns (user_data, repos, events). When the profile lookup fails the
+    repos and events fetches are not waited on and come back as None.
+    timeout bounds the whole wait, in seconds; past it TimeoutError is
+    raised and the fetches still queued are cancelled, so abandoned requests
+    do not grow the pool's backlog. Those already running finish and fill
+    the response cache.
+    """
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    try:
+        user_data = result_by(futures['user'], deadline)
+        if user_data:
+            return user_data, result_by(futures['repos'], deadline), result_by(futures['events'], deadline)
+    except TimeoutError:
+        cancel_pending(futures)
+        raise
+    cancel_pending(futures)
+    return None, None, None
+
+def dedupe_logins(logins):
+    """Drop blank and duplicate logins, case-insensitively, keeping first-seen order"""
+    seen = set()
+    unique = []
+    for login in logins:
+        login = login.strip()
+        if login and login.lower() not in seen:
+            seen.add(login.lower())
+            unique.append(login)
+    return unique
+
+def fan_out(keys, func):
+    """Run func(key) for every key on the shared batch pool.
+
+    Returns (key, result, error) tuples in input order; error is the raised
+    exception, if any, so one failing key does not abort the rest.
+    """
+    futures = [(key, _batch_executor.submit(func, key)) for key in keys]
+    outcomes = []
+    for key, future in futures:
+        try:
+            outcomes.append((key, future.result(), None))
+        except Exception as exc:
+            outcomes.append((key, None, exc))
+    return outcomes
@@ -0,0 +1,576 @@
+"""Fetching, metrics and README rendering shared by the Flask entry points (app.py, api/index.py) and asgi_app.py
+
+Nothing here imports Flask. Modules only some requests need, like numpy for
+the activity heatmap, are imported where they are used, so a cold start pays
+for them on the first request that does.
+"""
+import hashlib
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+from admission import ADMISSION_RETRY_AFTER, REQUEST_DEADLINE, AdmissionController, DeadlineExceeded
+from background_refresh import BackgroundRefresher
+from concurrent_fetch import (SharedFetches, cancel_pending, gather_user_bundle, result_by, submit_profile_fetches,
+                              submit_user_fetches)
+from event_analytics import aggregate_events, streak_summary
+from github_client import UpstreamError, decode_json, get_client, raise_for_upstream
+from graphql_backend import GraphQLBackend
+from history_store import HISTORY_EVENT_PAGES, create_history_store
+from instrumentation import instrument
+from language_stats import LANGUAGE_STATS_MODE, LanguageStats
+from org_crawler import OrgCrawler
+from readme_renderer import renderer
+from records import event_record, repo_record
+from singleflight import SingleFlight
+from snapshot_cache import SnapshotCache
+
+# GitHub API configuration
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')  # Override to point at a stub server
+GITHUB_GRAPHQL_URL = os.environ.get('GITHUB_GRAPHQL_URL', f'{GITHUB_API_URL}/graphql')
+GITHUB_FETCH_BACKEND = os.environ.get('GITHUB_FETCH_BACKEND', 'rest')  # 'graphql' fetches profile and repos in one query (needs a token)
+
+def get_headers():
+    """Get headers for GitHub API requests; tokens are added per call by the rate limit scheduler"""
+    return {'Accept': 'application/vnd.github.v3+json'}
+
+# Batch endpoint configuration
+BATCH_MAX_USERS = int(os.environ.get('BATCH_MAX_USERS', '100'))  # Logins accepted per POST /api/users
+
+# Shared pooled client; headers are set once on its session
+github = get_client(get_headers())
+graphql = GraphQLBackend(github, GITHUB_GRAPHQL_URL)
+
+# Concurrent requests for the same user share one fetch-and-compute
+inflight = SingleFlight()
+
+# Computed metrics per login, shared by the stats and README endpoints
+snapshots = SnapshotCache()
+
+# Bounds the snapshot builds the stats and README endpoints run at once
+admission = AdmissionController()
+
+# All-time event history and rollups, when HISTORY_STORE is enabled
+history = create_history_store()
+
+@instrument
+def fetch_user_data(username):
+    """Fetch user profile data from GitHub API"""
+    url = f"{GITHUB_API_URL}/users/{username}"
+    response = github.get(url)
+    if response.status_code == 200:
+        return decode_json(response)
+    if response.status_code == 404:
+        return None
+    raise_for_upstream(response)
+
+@instrument
+def fetch_user_repos(username):
+    """Fetch all user repositories, following pagination"""
+    url = f"{GITHUB_API_URL}/users/{username}/repos?per_page=100"
+    repos = github.get_all_pages(url, project=repo_record)
+    return repos if repos is not None else []
+
+@instrument
+def fetch_user_events(username, page=1):
+    """Fetch user recent events for activity analysis"""
+    url = f"{GITHUB_API_URL}/users/{username}/events?per_page=100"
+    if page > 1:
+        url += f"&page={page}"
+    response = github.get(url, project=event_record)
+    if response.status_code == 200:
+        return decode_json(response)
+    if response.status_code == 404:
+        return []
+    raise_for_upstream(response)
+
+@instrument
+def fetch_new_events(username):
+    """Fetch the events newer than the newest one in the history store, paging back until a known one"""
+    last_id = history.last_event_id(username)
+    events = []
+    for page in range(1, HISTORY_EVENT_PAGES + 1):
+        page_events = fetch_user_events(username, page)
+        new_events = [event for event in page_events if int(event.id) > last_id]
+        events.extend(new_events)
+        if len(new_events) < 100:
+            break
+    return events
+
+@instrument
+def fetch_repo_languages(full_name):
+    """Fetch bytes of code per language for one repository"""
+    # Bypasses the response cache: language_sizes keeps each result until the repo's next push
+    response = github.send(f"{GITHUB_API_URL}/repos/{full_name}/languages")
+    if response.status_code == 200:
+        return decode_json(response)
+    if response.status_code == 404:
+        return {}
+    raise_for_upstream(response)
+
+# Byte-weighted language totals, cached per repo push and per user
+language_sizes = LanguageStats(fetch_repo_languages)
+
+@instrument
+def fetch_user_profile(username):
+    """Fetch the profile and all repositories with the GraphQL backend; None if the user does not exist"""
+    return graphql.fetch_profile(username)
+
+def submit_fetches(username):
+    """Start a user's upstream fetches on the shared pool using the configured backend"""
+    fetch_events = fetch_new_events if history is not None else fetch_user_events
+    if GITHUB_FETCH_BACKEND == 'graphql':
+        return submit_profile_fetches(username, fetch_user_profile, fetch_events)
+    return submit_user_fetches(username, fetch_user_data, fetch_user_repos, fetch_events)
+
+# Snapshot builds and streams for the same user wait on one set of fetches
+fetches = SharedFetches(submit_fetches)
+
+def member_login(member):
+    return member['login']
+
+@instrument
+def fetch_org_page(org, kind, page):
+    """Fetch one page of an org's members or repos as (items, has_next); None if the org does not exist"""
+    url = f"{GITHUB_API_URL}/orgs/{org}/{kind}?per_page=100&page={page}"
+    response = github.get(url, project=member_login if kind == 'members' else repo_record)
+    if response.status_code == 200:
+        return decode_json(response), 'next' in response.links
+    if response.status_code == 404:
+        return None
+    raise_for_upstream(response)
+
+@instrument
+def calculate_language_stats(repos):
+    """Calculate programming language statistics"""
+    languages = {}
+    for repo in repos:
+        if repo.language:
+            languages[repo.language] = languages.get(repo.language, 0) + 1
+    return languages
+
+@instrument
+def calculate_activity_stats(events):
+    """Calculate activity statistics from events"""
+    activity = {}
+    for event in events:
+        event_type = event.type
+        activity[event_type] = activity.get(event_type, 0) + 1
+    return activity
+
+@instrument
+def calculate_contribution_stats(events):
+    """Calculate detailed contribution statistics"""
+    stats = {
+        'commits': 0,
+        'pull_requests': 0,
+        'issues': 0,
+        'reviews': 0,
+        'total_contributions': 0
+    }
+    
+    for event in events:
+        if event.type == 'PushEvent':
+            stats['commits'] += event.commits
+        elif event.type == 'PullRequestEvent':
+            stats['pull_requests'] += 1
+        elif event.type == 'IssuesEvent':
+            stats['issues'] += 1
+        elif event.type == 'PullRequestReviewEvent':
+            stats['reviews'] += 1
+    
+    stats['total_contributions'] = stats['commits'] + stats['pull_requests'] + stats['issues'] + stats['reviews']
+    return stats
+
+@instrument
+def analyze_activity_times(events):
+    """Analyze most active times of day"""
+    hours = defaultdict(int)
+    for event in events:
+        hours[event.hour] += 1
+    
+    # Return top 5 most active hours
+    sorted_hours = sorted(hours.items(), key=lambda x: x[1], reverse=True)[:5]
+    return [{'hour': h, 'count': c} for h, c in sorted_hours]
+
+@instrument
+def calculate_achievements(user_data, repos, events, contribution_stats):
+    """Calculate user achievements based on their activity"""
+    achievements = []
+    
+    # Follower achievements
+    followers = user_data.get('followers', 0)
+    if followers >= 100:
+        achievements.append({'name': 'Popular', 'description': '100+ followers', 'icon': '⭐'})
+    elif followers >= 50:
+        achievements.append({'name': 'Influential', 'description': '50+ followers', 'icon': '🌟'})
+    
+    # Repository achievements
+    public_repos = user_data.get('public_repos', 0)
+    if public_repos >= 50:
+        achievements.append({'name': 'Prolific', 'description': '50+ repositories', 'icon': '📚'})
+    elif public_repos >= 20:
+        achievements.append({'name': 'Builder', 'description': '20+ repositories', 'icon': '🏗️'})
+    
+    # Star achievements
+    total_stars = sum(repo.stargazers_count for repo in repos)
+    if total_stars >= 100:
+        achievements.append({'name': 'Star Collector', 'description': '100+ stars', 'icon': '⭐'})
+    elif total_stars >= 50:
+        achievements.append({'name': 'Rising Star', 'description': '50+ stars', 'icon': '✨'})
+    
+    # Contribution achievements
+    if contribution_stats['commits'] >= 100:
+        achievements.append({'name': 'Committed', 'description': '100+ commits', 'icon': '💪'})
+    
+    if contribution_stats['pull_requests'] >= 20:
+        achievements.append({'name': 'Collaborator', 'description': '20+ pull requests', 'icon': '🤝'})
+    
+    # Activity achievements
+    if len(events) >= 50:
+        achievements.append({'name': 'Active', 'description': '50+ recent activities', 'icon': '🔥'})
+    
+    # Account age achievements
+    created_at = datetime.strptime(user_data['created_at'], '%Y-%m-%dT%H:%M:%SZ')
+    account_age = (datetime.now() - created_at).days
+    if account_age >= 365 * 3:
+        achievements.append({'name': 'Veteran', 'description': '3+ years on GitHub', 'icon': '🎖️'})
+    elif account_age >= 365:
+        achievements.append({'name': 'Member', 'description': '1+ year on GitHub', 'icon': '🎉'})
+    
+    return achievements
+
+def summarize_user(user_data, username):
+    """Profile fields returned by the stats endpoints"""
+    summary = {
+        'name': user_data.get('name', username),
+        'login': user_data['login'],
+        'avatar_url': user_data['avatar_url'],
+        'bio': user_data.get('bio', ''),
+        'location': user_data.get('location', ''),
+        'company': user_data.get('company', ''),
+        'blog': user_data.get('blog', ''),
+        'twitter_username': user_data.get('twitter_username', ''),
+        'followers': user_data['followers'],
+        'following': user_data['following'],
+        'public_repos': user_data['public_repos'],
+        'created_at': user_data['created_at']
+    }
+    if 'contributions_last_year' in user_data:
+        # Only the GraphQL backend reads the contribution calendar
+        summary['contributions_last_year'] = user_data['contributions_last_year']
+    return summary
+
+def summarize_repos(repos, language_bytes=True):
+    """Language breakdown and star/fork totals across a user's repositories; language_bytes=False skips GitHub"""
+    sizes, partial = None, False
+    if LANGUAGE_STATS_MODE == 'bytes' and language_bytes:
+        sizes, partial = language_sizes.aggregate(repos)
+    return {
+        'total_stars': sum(repo.stargazers_count for repo in repos),
+        'total_forks': sum(repo.forks_count for repo in repos),
+        'languages': calculate_language_stats(repos),
+        'language_bytes': sizes,
+        'language_bytes_partial': partial
+    }
+
+def summarize_events(username, user_data, repos, events):
+    """Event stats and the events achievements count; from the stored history when it is enabled"""
+    if history is None:
+        return aggregate_events(events), events
+    # events holds only what is new since the last refresh; the rollups cover the rest
+    history.ingest(username, user_data, repos, events)
+    return history.event_stats(username), history.recent_events(username)
+
+def readme_digest(user_data, repo_stats, event_stats, achievements):
+    """Digest of everything a README renders from, computed once per snapshot to key the render memo"""
+    inputs = (user_data, repo_stats['languages'], repo_stats['total_stars'], repo_stats['total_forks'],
+              event_stats['contributions'], event_stats['streak'], achievements)
+    return hashlib.blake2b(repr(inputs).encode(), digest_size=16).hexdigest()
+
+def assemble_snapshot(user_data, repo_stats, event_stats, achievements):
+    return {
+        'user_data': user_data,
+        'languages': repo_stats['languages'],
+        'language_bytes': repo_stats['language_bytes'],
+        'language_bytes_partial': repo_stats['language_bytes_partial'],
+        'events': event_stats,
+        'achievements': achievements,
+        'total_stars': repo_stats['total_stars'],
+        'total_forks': repo_stats['total_forks'],
+        'readme_digest': readme_digest(user_data, repo_stats, event_stats, achievements)
+    }
+
+def make_snapshot(username, user_data, repo_stats, event_stats, achievements):
+    """Assemble a metrics snapshot and cache it for the user"""
+    snapshot = assemble_snapshot(user_data, repo_stats, event_stats, achievements)
+    snapshots.set(username.lower(), snapshot)
+    return snapshot
+
+def build_metrics_snapshot(username, deadline=None):
+    """Fetch a user's data and compute every metric the endpoints need; None if the user does not exist"""
+    user_data, repos, events = gather_user_bundle(fetches.get(username), deadline)
+    if not user_data:
+        return None
+    
+    repo_stats = summarize_repos(repos)
+    event_stats, events = summarize_events(username, user_data, repos, events)
+    achievements = calculate_achievements(user_data, repos, events, event_stats['contributions'])
+    return make_snapshot(username, user_data, repo_stats, event_stats, achievements)
+
+def refresh_metrics_snapshot(username, deadline=None):
+    """Rebuild a user's snapshot; concurrent callers for the same user share one fetch-and-compute.
+
+    With a deadline, raises DeadlineExceeded once GitHub has kept the caller
+    waiting that many seconds.
+    """
+    try:
+        return inflight.do(('snapshot', username.lower()), build_metrics_snapshot, username, deadline,
+                           timeout=deadline)
+    except TimeoutError:
+        raise deadline_exceeded(deadline)
+
+def deadline_exceeded(deadline):
+    return DeadlineExceeded(f'GitHub did not answer within {deadline:g}s', retry_after=ADMISSION_RETRY_AFTER)
+
+def get_metrics_snapshot(username):
+    """Return a user's metrics snapshot, reusing a cached one within its TTL.
+
+    While the background refresher runs, a stale snapshot is returned at once
+    and rebuilt behind the response.
+    """
+    snapshot = refresher.lookup(username.lower())
+    if snapshot is not None:
+        return snapshot
+    return refresh_metrics_snapshot(username)
+
+# Keeps frequently viewed users' snapshots fresh; only the long-running server starts it
+refresher = BackgroundRefresher(refresh_metrics_snapshot, snapshots, github.token_pool)
+
+def last_known_snapshot(username):
+    """(snapshot, fetched_at) from the newest data still held for a user however old, or (None, None).
+
+    Read from the snapshot cache, else rebuilt from the history store
+    without calling GitHub.
+    """
+    snapshot, fetched_at = snapshots.last_known(username.lower())
+    if snapshot is not None or history is None:
+        return snapshot, fetched_at
+    profile = history.load_profile(username)
+    if profile is None:
+        return None, None
+    user_data, repos, fetched_at = profile
+    event_stats, events = history.event_stats(username), history.recent_events(username)
+    achievements = calculate_achievements(user_data, repos, events, event_stats['contributions'])
+    return assemble_snapshot(user_data, summarize_repos(repos, language_bytes=False), event_stats,
+                             achievements), fetched_at
+
+def serve_metrics_snapshot(username, admit=True):
+    """(snapshot, None) for a stats or README request, or (last-known snapshot, fetched_at) when degraded.
+
+    Cache misses are built under admission control and REQUEST_DEADLINE;
+    admit=False skips admission control, for callers bounded by a pool of
+    their own like the batch endpoint. When the request is shed, times out,
+    or GitHub fails, the newest data still held for the user is served
+    instead of an error; without any, the error propagates. snapshot is None
+    when the user does not exist.
+    """
+    snapshot = refresher.lookup(username.lower())
+    if snapshot is not None:
+        return snapshot, None
+    try:
+        with admission if admit else nullcontext():
+            return refresh_metrics_snapshot(username, REQUEST_DEADLINE or None), None
+    except UpstreamError:
+        snapshot, fetched_at = last_known_snapshot(username)
+        if snapshot is None:
+            raise
+        return snapshot, fetched_at
+
+def mark_stale(body, fetched_at):
+    """Flag a response body built from last-known data, with when that data was fetched from GitHub"""
+    as_of = datetime.fromtimestamp(fetched_at, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    return {**body, 'stale': True, 'as_of': as_of}
+
+def last_known_events(username):
+    """(events, fetched_at) from the history store when GitHub cannot be reached, or (None, None)"""
+    profile = history.load_profile(username) if history is not None else None
+    if profile is None:
+        return None, None
+    return history.recent_events(username), profile[2]
+
+def build_user_stats(username):
+    """Comprehensive statistics for a user in the batch endpoint, flagged stale when last-known; None if missing"""
+    snapshot, fetched_at = serve_metrics_snapshot(username, admit=False)
+    if snapshot is None:
+        return None
+    stats = user_stats(username, snapshot)
+    return stats if fetched_at is None else mark_stale(stats, fetched_at)
+
+def user_stats(username, snapshot):
+    """The /api/user response body for a metrics snapshot"""
+    event_stats = snapshot['events']
+    stats = {
+        'user': summarize_user(snapshot['user_data'], username),
+        'stats': {
+            'total_stars': snapshot['total_stars'],
+            'total_forks': snapshot['total_forks'],
+            'languages': snapshot['languages'],
+            'language_bytes': snapshot['language_bytes'],
+            'language_bytes_partial': snapshot['language_bytes_partial'],
+            'activity': event_stats['activity'],
+            'contributions': event_stats['contributions'],
+            'activity_times': event_stats['activity_times'],
+            'streak': event_stats['streak']
+        },
+        'achievements': snapshot['achievements']
+    }
+    return stats
+
+def stream_line(section, data):
+    """One NDJSON line of the streaming stats response"""
+    return json.dumps({'section': section, 'data': data}) + '\n'
+
+def stream_user_sections(username):
+    """The streaming endpoint's stats sections, or None when the user does not exist.
+
+    A snapshot the refresher holds is streamed at once. Otherwise the
+    fetches run under admission control and REQUEST_DEADLINE, as in
+    serve_metrics_snapshot, and each section is sent once the calls it needs
+    have finished. When the request is shed, times out or GitHub fails, the
+    last-known snapshot is streamed instead, after a stale section. Without
+    one, the error propagates if nothing was sent yet, else it ends the
+    stream as an error section.
+    """
+    snapshot = refresher.lookup(username.lower())
+    if snapshot is not None:
+        return stream_snapshot_sections(username, snapshot)
+    sections = stream_fetched_sections(username)
+    # Run up to the profile here, so a missing user is still a plain 404 and a shed request a 503
+    try:
+        first = next(sections)
+    except StopIteration:
+        return None
+    except UpstreamError:
+        snapshot, fetched_at = last_known_snapshot(username)
+        if snapshot is None:
+            raise
+        return stream_snapshot_sections(username, snapshot, fetched_at)
+    return resume_sections(first, sections)
+
+def resume_sections(first, sections):
+    yield first
+    yield from sections
+
+def stream_fetched_sections(username):
+    """Yield each stats section as soon as the upstream calls it depends on finish, holding an admission slot"""
+    with admission:
+        deadline = time.monotonic() + REQUEST_DEADLINE if REQUEST_DEADLINE else None
+
+        def result(future):
+            try:
+                return result_by(future, deadline)
+            except TimeoutError:
+                cancel_pending(futures)
+                raise deadline_exceeded(REQUEST_DEADLINE)
+
+        futures = fetches.get(username)
+        user_data = result(futures['user'])
+        if not user_data:
+            cancel_pending(futures)
+            return
+        yield stream_line('user', summarize_user(user_data, username))
+        try:
+            repos = result(futures['repos'])
+            repo_stats = summarize_repos(repos)
+            yield stream_line('repositories', repo_stats)
+            
+            event_stats, events = summarize_events(username, user_data, repos, result(futures['events']))
+            yield stream_line('activity', event_stats)
+            
+            achievements = calculate_achievements(user_data, repos, events, event_stats['contributions'])
+            yield stream_line('achievements', achievements)
+        except UpstreamError as error:
+            snapshot, fetched_at = last_known_snapshot(username)
+            if snapshot is None:
+                yield stream_line('error', {'error': str(error)})
+            else:
+                yield from stream_snapshot_sections(username, snapshot, fetched_at)
+            return
+        make_snapshot(username, user_data, repo_stats, event_stats, achievements)
+
+def stream_snapshot_sections(username, snapshot, fetched_at=None):
+    """Yield every stats section from a cached snapshot, after a stale section when it is last-known data"""
+    if fetched_at is not None:
+        yield stream_line('stale', mark_stale({}, fetched_at))
+    yield stream_line('user', summarize_user(snapshot['user_data'], username))
+    yield stream_line('repositories', {
+        'total_stars': snapshot['total_stars'],
+        'total_forks': snapshot['total_forks'],
+        'languages': snapshot['languages'],
+        'language_bytes': snapshot['language_bytes'],
+        'language_bytes_partial': snapshot['language_bytes_partial']
+    })
+    yield stream_line('activity', snapshot['events'])
+    yield stream_line('achievements', snapshot['achievements'])
+
+def summarize_member(login):
+    """Per-member figures merged into the org aggregates"""
+    repos = fetch_user_repos(login)
+    events = fetch_user_events(login)
+    contributions = calculate_contribution_stats(events)
+    streak = streak_summary({event.day for event in events})
+    return {
+        'languages': calculate_language_stats(repos),
+        'stars': sum(repo.stargazers_count for repo in repos),
+        **contributions,
+        'current_streak': streak['current_streak'],
+        'longest_streak': streak['longest_streak']
+    }
+
+# Resumable org crawls, checkpointed to disk between calls
+org_crawler = OrgCrawler(fetch_org_page, summarize_member)
+
+def render_readme(snapshot, template):
+    """Render one README template from a metrics snapshot"""
+    user_data = snapshot['user_data']
+    language_stats = snapshot['languages']
+    contribution_stats = snapshot['events']['contributions']
+    streak_data = snapshot['events']['streak']
+    achievements = snapshot['achievements']
+    total_stars = snapshot['total_stars']
+    total_forks = snapshot['total_forks']
+    digest = snapshot.get('readme_digest')
+    
+    if template == 'minimal':
+        return generate_minimal_template(user_data, language_stats, total_stars, total_forks, digest)
+    elif template == 'detailed':
+        return generate_detailed_template(user_data, language_stats, contribution_stats, streak_data, achievements, total_stars, total_forks, digest)
+    elif template == 'badges':
+        return generate_badges_template(user_data, language_stats, contribution_stats, total_stars, total_forks, digest)
+    else:  # default
+        return generate_default_template(user_data, language_stats, contribution_stats, total_stars, total_forks, digest)
+
+@instrument
+def generate_default_template(user_data, languages, contributions, total_stars, total_forks, digest=None):
+    """Generate default README template"""
+    return renderer.render('default', user_data, languages, total_stars, total_forks, key=digest)
+
+@instrument
+def generate_minimal_template(user_data, language_stats, total_stars, total_forks, digest=None):
+    """Generate minimal README template"""
+    return renderer.render('minimal', user_data, language_stats, total_stars, total_forks, key=digest)
+
+@instrument
+def generate_detailed_template(user_data, language_stats, contribution_stats, streak_data, achievements, total_stars, total_forks, digest=None):
+    """Generate detailed README template"""
+    return renderer.render('detailed', user_data, language_stats, total_stars, total_forks,
+                           contributions=contribution_stats, streak=streak_data, achievements=achievements, key=digest)
+
+@instrument
+def generate_badges_template(user_data, language_stats, contribution_stats, total_stars, total_forks, digest=None):
+    """Generate README with focus on badges and visual elements"""
+    return renderer.render('badges', user_data, language_stats, total_stars, total_forks, key=digest)
@@ -0,0 +1,126 @@
+from datetime import date, datetime
+
+from instrumentation import instrument
+from records import EPOCH_ORDINAL
+
+# Event types counted towards contribution stats
+CONTRIBUTION_KEYS = {
+    'PullRequestEvent': 'pull_requests',
+    'IssuesEvent': 'issues',
+    'PullRequestReviewEvent': 'reviews',
+}
+
+def calculate_streaks(dates, today=None):
+    """Current and longest streak over a set of active dates"""
+    sorted_dates = sorted(dates, reverse=True)
+    current_streak = 0
+    longest_streak = 0
+    temp_streak = 1
+
+    today = today or datetime.now().date()
+    if sorted_dates and (today - sorted_dates[0]).days <= 1:
+        current_streak = 1
+        for i in range(1, len(sorted_dates)):
+            if (sorted_dates[i-1] - sorted_dates[i]).days == 1:
+                current_streak += 1
+            else:
+                break
+
+    for i in range(1, len(sorted_dates)):
+        if (sorted_dates[i-1] - sorted_dates[i]).days == 1:
+            temp_streak += 1
+            longest_streak = max(longest_streak, temp_streak)
+        else:
+            temp_streak = 1
+
+    longest_streak = max(longest_streak, current_streak)
+    return current_streak, longest_streak
+
+def streak_summary(dates, today=None):
+    """Streak figures over a set of active dates, keyed like the stats response"""
+    current_streak, longest_streak = calculate_streaks(dates, today)
+    return {
+        'current_streak': current_streak,
+        'longest_streak': longest_streak,
+        'total_days': len(dates)
+    }
+
+class EventAggregator:
+    """Single-pass fold over events producing every event-derived statistic.
+
+    Matches calculate_activity_stats, calculate_contribution_stats,
+    analyze_activity_times and streak_summary over Event records
+    (see records.event_record). Events can be fed in
+    any number of batches, so paginated histories never need to be held in
+    memory at once.
+    """
+
+    def __init__(self):
+        self.total_events = 0
+        self.event_types = {}
+        self.commits = 0
+        self.counts = {'pull_requests': 0, 'issues': 0, 'reviews': 0}
+        self.hours = {}
+        self.days = set()
+
+    def update(self, events):
+        """Fold an iterable of events into the running totals"""
+        event_types = self.event_types
+        counts = self.counts
+        hours = self.hours
+        days = self.days
+        commits = 0
+        total = 0
+        for event in events:
+            total += 1
+            event_type = event.type
+            event_types[event_type] = event_types.get(event_type, 0) + 1
+            if event_type == 'PushEvent':
+                commits += event.commits
+            elif event_type in CONTRIBUTION_KEYS:
+                counts[CONTRIBUTION_KEYS[event_type]] += 1
+
+            # Hour of day and epoch day straight from the pre-parsed timestamp
+            created = event.created
+            hour = created // 3600 % 24
+            hours[hour] = hours.get(hour, 0) + 1
+            days.add(created // 86400)
+        self.commits += commits
+        self.total_events += total
+        return self
+
+    def activity_stats(self):
+        return dict(self.event_types)
+
+    def contribution_stats(self):
+        stats = {
+            'commits': self.commits,
+            'pull_requests': self.counts['pull_requests'],
+            'issues': self.counts['issues'],
+            'reviews': self.counts['reviews'],
+            'total_contributions': 0
+        }
+        stats['total_contributions'] = stats['commits'] + stats['pull_requests'] + stats['issues'] + stats['reviews']
+        return stats
+
+    def activity_times(self):
+        # Top 5 most active hours; ties keep first-seen order like the original sort
+        sorted_hours = sorted(self.hours.items(), key=lambda x: x[1], reverse=True)[:5]
+        return [{'hour': h, 'count': c} for h, c in sorted_hours]
+
+    def streak_data(self, today=None):
+        return streak_summary({date.fromordinal(EPOCH_ORDINAL + day) for day in self.days}, today)
+
+    def result(self):
+        """All event-derived statistics, keyed like the stats response"""
+        return {
+            'activity': self.activity_stats(),
+            'contributions': self.contribution_stats(),
+            'activity_times': self.activity_times(),
+            'streak': self.streak_data()
+        }
+
+@instrument
+def aggregate_events(events):
+    """Compute activity, contribution, activity time and streak stats in one pass"""
+    return EventAggregator().update(events).result()
@@ -0,0 +1,255 @@
+"""Export metrics for many users to a JSONL or CSV file, offline from the web app.
+
+Logins are read one per line from a file, or from stdin when the file is '-'.
+Up to --concurrency users are fetched at once on a thread pool, and their
+metrics are computed on a pool of --processes worker processes. Each user is
+appended to the output as soon as it is done, so memory stays flat however
+many users are exported.
+
+The output doubles as the checkpoint: an interrupted run (Ctrl-C, a crash, or
+GitHub's rate limit) is resumed by running the same command again, which skips
+every login already in the file. Users that do not exist are written with an
+error so they are not retried; users whose fetch failed are left out and
+retried by the next run. Pass --restart to overwrite the file instead.
+
+Set GITHUB_API_URL to export from the stub server in benchmarks/github_stub.py.
+Event stats are computed from the events feed, without the history store.
+
+Usage: python export_metrics.py LOGINS|- [--output metrics.jsonl] [--format jsonl|csv] [--concurrency 16]
+                                [--processes N] [--restart] [--progress 5]
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from itertools import islice
+from multiprocessing import get_context
+
+from core import (GITHUB_FETCH_BACKEND, calculate_achievements, calculate_language_stats, fetch_user_data,
+                  fetch_user_events, fetch_user_profile, fetch_user_repos, language_sizes, summarize_user)
+from event_analytics import aggregate_events
+from github_client import UpstreamError
+from language_stats import LANGUAGE_STATS_MODE
+
+# Columns of the CSV format; JSONL lines carry the full /api/user response plus 'login'
+CSV_FIELDS = ('login', 'name', 'followers', 'following', 'public_repos', 'created_at', 'total_stars', 'total_forks',
+              'top_language', 'commits', 'pull_requests', 'issues', 'reviews', 'total_contributions',
+              'current_streak', 'longest_streak', 'active_days', 'events', 'achievements', 'error')
+
+def read_logins(stream, done):
+    """Yield each login in stream once, case-insensitively, skipping those in done"""
+    seen = set(done)
+    for line in stream:
+        login = line.strip()
+        if login and login.lower() not in seen:
+            seen.add(login.lower())
+            yield login
+
+def fetch_bundle(login):
+    """(user_data, repos, events, language_bytes, language_bytes_partial) for login, or None if there is no such user"""
+    if GITHUB_FETCH_BACKEND == 'graphql':
+        profile = fetch_user_profile(login)
+        if profile is None:
+            return None
+        user_data, repos = profile
+    else:
+        user_data = fetch_user_data(login)
+        if user_data is None:
+            return None
+        repos = fetch_user_repos(login)
+    events = fetch_user_events(login)
+    language_bytes, partial = language_sizes.aggregate(repos) if LANGUAGE_STATS_MODE == 'bytes' else (None, False)
+    return user_data, repos, events, language_bytes, partial
+
+def compute_record(login, user_data, repos, events, language_bytes, language_bytes_partial):
+    """The /api/user response for one user, plus its login; runs in a worker process"""
+    event_stats = aggregate_events(events)
+    return {
+        'login': login,
+        'user': summarize_user(user_data, login),
+        'stats': {
+            'total_stars': sum(repo.stargazers_count for repo in repos),
+            'total_forks': sum(repo.forks_count for repo in repos),
+            'languages': calculate_language_stats(repos),
+            'language_bytes': language_bytes,
+            'language_bytes_partial': language_bytes_partial,
+            'activity': event_stats['activity'],
+            'contributions': event_stats['contributions'],
+            'activity_times': event_stats['activity_times'],
+            'streak': event_stats['streak']
+        },
+        'achievements': calculate_achievements(user_data, repos, events, event_stats['contributions'])
+    }
+
+def export_user(login, processes):
+    """Fetch and compute one user's record; the computation goes to the process pool when there is one"""
+    bundle = fetch_bundle(login)
+    if bundle is None:
+        return {'login': login, 'error': 'User not found'}
+    if processes is None:
+        return compute_record(login, *bundle)
+    return processes.submit(compute_record, login, *bundle).result()
+
+def csv_row(record):
+    """Flatten a record to CSV_FIELDS"""
+    if 'error' in record:
+        return {'login': record['login'], 'error': record['error']}
+    user, stats = record['user'], record['stats']
+    languages = stats['language_bytes'] or stats['languages']
+    return {
+        'login': record['login'],
+        'name': user['name'],
+        'followers': user['followers'],
+        'following': user['following'],
+        'public_repos': user['public_repos'],
+        'created_at': user['created_at'],
+        'total_stars': stats['total_stars'],
+        'total_forks': stats['total_forks'],
+        'top_language': max(languages, key=languages.get) if languages else '',
+        **stats['contributions'],
+        'current_streak': stats['streak']['current_streak'],
+        'longest_streak': stats['streak']['longest_streak'],
+        'active_days': stats['streak']['total_days'],
+        'events': sum(stats['activity'].values()),
+        'achievements': ';'.join(achievement['name'] for achievement in record['achievements']),
+        'error': ''
+    }
+
+class ExportFile:
+    """Append-only JSONL or CSV output whose contents are the checkpoint of the run"""
+
+    def __init__(self, path, fmt, restart=False):
+        self.path = path
+        self.fmt = fmt
+        self.done = set() if restart else self.completed()
+        self._file = open(path, 'w' if restart else 'a', encoding='utf-8', newline='')
+        self._csv = None
+        if fmt == 'csv':
+            self._csv = csv.DictWriter(self._file, CSV_FIELDS)
+            if self._file.tell() == 0:
+                self._csv.writeheader()
+
+    def completed(self):
+        """Lowercased logins already in the file, after cutting off a partly written last line"""
+        try:
+            self.cut_partial_line()
+        except FileNotFoundError:
+            return set()
+        # Read a line at a time: a resumed export can be far larger than memory
+        with open(self.path, encoding='utf-8', newline='') as f:
+            if self.fmt == 'csv':
+                return {row['login'].lower() for row in csv.DictReader(f) if row.get('login')}
+            return {json.loads(line)['login'].lower() for line in f if line.strip()}
+
+    def cut_partial_line(self, block_size=65536):
+        """Truncate the file after its last newline, reading backwards from the end in blocks"""
+        with open(self.path, 'rb+') as f:
+            end = position = f.seek(0, os.SEEK_END)
+            while position > 0:
+                start = max(position - block_size, 0)
+                f.seek(start)
+                block = f.read(position - start)
+                if position == end and block.endswith(b'\n'):
+                    return
+                newline = block.rfind(b'\n')
+                if newline != -1:
+                    f.truncate(start + newline + 1)
+                    return
+                position = start
+            f.truncate(0)
+
+    def write(self, record):
+        if self._csv is not None:
+            self._csv.writerow(csv_row(record))
+        else:
+            self._file.write(json.dumps(record) + '\n')
+        # One complete line per user reaches the file before the next is started on
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+def report(counts, started, final=False):
+    elapsed = time.perf_counter() - started
+    finished = counts['exported'] + counts['not_found']
+    print(f"{'done' if final else 'progress'}: {finished} users in {elapsed:.1f}s "
+          f"({finished / elapsed if elapsed else 0:.1f} users/s), {counts['not_found']} not found, "
+          f"{counts['failed']} failed, {counts['skipped']} already exported", file=sys.stderr)
+
+def export(logins, output, concurrency, processes=None, progress=5.0):
+    """Export every login to output, concurrency users in flight at a time; returns the counters and retry_after"""
+    counts = {'exported': 0, 'not_found': 0, 'failed': 0, 'skipped': len(output.done)}
+    retry_after = None
+    started = last_report = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='export-fetch') as io_pool:
+        # Only a bounded window of logins is read ahead, so a huge input is never held in full
+        pending = {io_pool.submit(export_user, login, processes): login
+                   for login in islice(logins, concurrency * 2)}
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                login = pending.pop(future)
+                try:
+                    record = future.result()
+                except UpstreamError as error:
+                    counts['failed'] += 1
+                    if error.retry_later:
+                        retry_after = error.retry_after or 0
+                    else:
+                        print(f'{login}: {error}', file=sys.stderr)
+                    continue
+                output.write(record)
+                counts['not_found' if 'error' in record else 'exported'] += 1
+            if retry_after is None:
+                # Stop reading logins once rate limited; the rest are picked up by the next run
+                for login in islice(logins, len(finished)):
+                    pending[io_pool.submit(export_user, login, processes)] = login
+            if progress and time.perf_counter() - last_report >= progress:
+                last_report = time.perf_counter()
+                report(counts, started)
+    report(counts, started, final=True)
+    return counts, retry_after
+
+def main():
+    parser = argparse.ArgumentParser(description='Export metrics for many users to JSONL or CSV')
+    parser.add_argument('logins', help="file with one login per line, or '-' for stdin")
+    parser.add_argument('--output', default='metrics.jsonl')
+    parser.add_argument('--format', choices=('jsonl', 'csv'),
+                        help='defaults to csv when --output ends in .csv, else jsonl')
+    parser.add_argument('--concurrency', type=int, default=16, help='users fetched at once')
+    parser.add_argument('--processes', type=int, default=os.cpu_count(),
+                        help='worker processes for the metrics; 0 computes them on the fetch threads')
+    parser.add_argument('--restart', action='store_true', help='overwrite the output instead of resuming it')
+    parser.add_argument('--progress', type=float, default=5, help='seconds between progress lines, 0 for none')
+    args = parser.parse_args()
+    fmt = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+
+    output = ExportFile(args.output, fmt, args.restart)
+    source = sys.stdin if args.logins == '-' else open(args.logins, encoding='utf-8')
+    # Spawned rather than forked: the parent already runs fetch and cache threads
+    processes = ProcessPoolExecutor(args.processes, mp_context=get_context('spawn')) if args.processes > 0 else None
+    try:
+        counts, retry_after = export(read_logins(source, output.done), output, args.concurrency, processes,
+                                     args.progress)
+    except KeyboardInterrupt:
+        print(f'Interrupted; run the same command again to resume {args.output}', file=sys.stderr)
+        sys.exit(130)
+    finally:
+        if processes is not None:
+            processes.shutdown(cancel_futures=True)
+        output.close()
+        if source is not sys.stdin:
+            source.close()
+
+    if retry_after is not None:
+        print(f'Rate limited; run the same command again in {retry_after:.0f}s to resume {args.output}',
+              file=sys.stderr)
+        sys.exit(75)
+    if counts['failed']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from urllib.parse import parse_qs, urlencode, urlsplit, urlunsplit
+
+from circuit_breaker import CircuitBreaker
+from instrumentation import metrics, record, submit_in_context, timed
+from rate_limit import BudgetExhausted, TokenPool, configured_tokens
+from response_cache import CachedResponse, create_cache, decode_entry
+
+# HTTP client configuration
+GITHUB_POOL_SIZE = int(os.environ.get('GITHUB_POOL_SIZE', '20'))  # Keep-alive connections kept per host
+GITHUB_TIMEOUT = float(os.environ.get('GITHUB_TIMEOUT', '10'))  # Seconds, applied to connect and read
+GITHUB_MAX_RETRIES = int(os.environ.get('GITHUB_MAX_RETRIES', '3'))
+GITHUB_BACKOFF_BASE = float(os.environ.get('GITHUB_BACKOFF_BASE', '0.5'))  # Seconds, doubled per attempt
+GITHUB_MAX_RETRY_WAIT = float(os.environ.get('GITHUB_MAX_RETRY_WAIT', '10'))  # Longer waits fail fast instead
+GITHUB_MAX_PAGES = int(os.environ.get('GITHUB_MAX_PAGES', '10'))  # Cap on pages fetched per list endpoint
+GITHUB_PAGE_CONCURRENCY = int(os.environ.get('GITHUB_PAGE_CONCURRENCY', '4'))  # Shared across all requests
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+class UpstreamError(Exception):
+    """Raised when GitHub cannot serve a request, even after retries"""
+
+    def __init__(self, message, status_code=None, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def rate_limited(self):
+        return self.status_code in (403, 429)
+
+    @property
+    def retry_later(self):
+        """Whether the same call should succeed once retry_after passes, so callers pause rather than fail"""
+        return self.rate_limited
+
+    @property
+    def http_status(self):
+        """Status the API answers with: 503 when the client should retry later, else 502"""
+        return 503 if self.retry_later else 502
+
+class CircuitOpen(UpstreamError):
+    """Raised instead of calling GitHub while the circuit breaker is open"""
+
+    @property
+    def retry_later(self):
+        return True
+
+def parse_retry_after(response):
+    """Return the number of seconds GitHub asks us to wait, or None"""
+    value = response.headers.get('Retry-After')
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                return None
+    if response.headers.get('X-RateLimit-Remaining') == '0':
+        reset = response.headers.get('X-RateLimit-Reset')
+        if reset and reset.isdigit():
+            return max(int(reset) - time.time(), 0.0)
+    return None
+
+def is_retryable(response):
+    """Check whether a response is a transient failure worth retrying"""
+    if response.status_code in RETRYABLE_STATUSES:
+        return True
+    # Primary and secondary rate limits are reported as 403s with extra headers
+    return response.status_code == 403 and (
+        'Retry-After' in response.headers or response.headers.get('X-RateLimit-Remaining') == '0'
+    )
+
+def remaining_page_urls(response, max_pages):
+    """Build the URLs of pages 2..last from a first page's rel="last" link"""
+    last = response.links.get('last')
+    if not last:
+        return []
+    scheme, netloc, path, query, fragment = urlsplit(last['url'])
+    params = parse_qs(query)
+    last_page = min(int(params.get('page', ['1'])[0]), max_pages)
+    urls = []
+    for page in range(2, last_page + 1):
+        params['page'] = [str(page)]
+        urls.append(urlunsplit((scheme, netloc, path, urlencode(params, doseq=True), fragment)))
+    return urls
+
+def cache_key(url, params=None, project=None):
+    """Response cache key of a GET: the full URL, plus the projection applied to its items"""
+    from requests import Request
+    key = Request('GET', url, params=params).prepare().url
+    return f'{key}#{project.__name__}' if project is not None else key
+
+class GitHubClient:
+    """Pooled keep-alive HTTP client for the GitHub API with retry and backoff"""
+
+    def __init__(self, headers=None, pool_size=GITHUB_POOL_SIZE, timeout=GITHUB_TIMEOUT,
+                 max_retries=GITHUB_MAX_RETRIES, backoff_base=GITHUB_BACKOFF_BASE,
+                 max_retry_wait=GITHUB_MAX_RETRY_WAIT, cache=None, token_pool=None, breaker=None):
+        self.cache = cache
+        self.token_pool = token_pool or TokenPool([])
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_retry_wait = max_retry_wait
+        self.headers = headers or {}
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self):
+        """The keep-alive session, created on first use so importing the app does not load requests"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    session = requests.Session()
+                    session.headers.update(self.headers)
+                    adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session = session
+        return self._session
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff delay for the given attempt"""
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    def get(self, url, params=None, headers=None, project=None):
+        """GET a GitHub API URL through the response cache, if one is configured.
+
+        Fresh entries are served without a request; stale ones are revalidated
+        with If-None-Match/If-Modified-Since so a 304 reuses the cached body.
+        project, if given, is mapped over the items of a 200's list body right
+        after decoding, and only its compact output is cached.
+        """
+        if self.cache is None:
+            response = self.send(url, params, headers)
+            if response.status_code == 200 and project is not None:
+                return CachedResponse(decode_entry(response, project))
+            return response
+
+        key = cache_key(url, params, project)
+        entry, fresh = self.cache.lookup(key)
+        if fresh:
+            self.cache.count('hits')
+            return CachedResponse(entry)
+        if entry is not None:
+            headers = {**(headers or {}), **entry.validators()}
+
+        response = self.send(url, params, headers)
+        if response.status_code == 304 and entry is not None:
+            self.cache.count('revalidations')
+            self.cache.refresh(key, entry)
+            return CachedResponse(entry)
+        self.cache.count('misses')
+        if response.status_code == 200:
+            return CachedResponse(self.cache.store(key, response, project))
+        return response
+
+    def get_all_pages(self, url, project=None, max_pages=GITHUB_MAX_PAGES):
+        """Fetch every page of a list endpoint and merge the items in order.
+
+        Pages after the first are fetched concurrently on the shared page pool.
+        Each item is passed through project, if given, as soon as its page is
+        decoded. Returns None when the first page is a 404.
+        """
+        response = self.get(url, project=project)
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            raise_for_upstream(response)
+
+        pages = [response]
+        urls = remaining_page_urls(response, max_pages)
+        if urls:
+            futures = [submit_in_context(_page_executor, self.get, url, None, None, project) for url in urls]
+            pages.extend(future.result() for future in futures)
+
+        items = []
+        for page in pages:
+            if page.status_code != 200:
+                raise_for_upstream(page)
+            items.extend(decode_json(page))
+        return items
+
+    def post(self, url, body):
+        """POST a JSON body, e.g. a GraphQL query; never cached, retried like GETs"""
+        return self.send(url, body=body)
+
+    def send(self, url, params=None, headers=None, body=None):
+        """GET a GitHub API URL, or POST body as JSON when given, retrying transient failures.
+
+        Any non-retryable response (including 404) is returned as-is. Raises
+        UpstreamError when retries are exhausted or GitHub asks us to wait
+        longer than max_retry_wait, and CircuitOpen without a request while
+        the circuit breaker is open.
+        """
+        from requests import RequestException
+        check_circuit(self.breaker)
+        attempt = 0
+        while True:
+            try:
+                budget = self.token_pool.acquire()
+            except BudgetExhausted as exc:
+                raise UpstreamError(str(exc), 429, exc.retry_after)
+            request_headers = dict(headers or {})
+            if budget.token:
+                request_headers['Authorization'] = f'token {budget.token}'
+
+            start = time.perf_counter()
+            try:
+                response = self.session.request('GET' if body is None else 'POST', url, params=params, json=body,
+                                                headers=request_headers, timeout=self.timeout)
+            except RequestException as exc:
+                metrics.count_upstream('error')
+                self.token_pool.release(budget)
+                error = UpstreamError(f'GitHub request failed: {exc}')
+                delay = self.backoff(attempt)
+            else:
+                record('github_http', time.perf_counter() - start)
+                metrics.count_upstream(response.status_code)
+                self.token_pool.release(budget, response.headers)
+                if not is_retryable(response):
+                    self.breaker.record_success()
+                    return response
+                retry_after = parse_retry_after(response)
+                error = UpstreamError(f'GitHub API returned {response.status_code}',
+                                      response.status_code, retry_after)
+                if retry_after is not None:
+                    # Honor the server's wait, with jitter so blocked callers don't retry in lockstep
+                    delay = retry_after + random.uniform(0, self.backoff_base)
+                else:
+                    delay = self.backoff(attempt)
+
+            if attempt >= self.max_retries or delay > self.max_retry_wait:
+                self.breaker.record_failure(error.retry_after)
+                raise error
+            time.sleep(delay)
+            attempt += 1
+
+_page_executor = ThreadPoolExecutor(max_workers=GITHUB_PAGE_CONCURRENCY, thread_name_prefix='github-page')
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client(headers=None):
+    """Return the process-wide GitHub client, creating it on first use"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GitHubClient(headers, cache=create_cache(), token_pool=TokenPool(configured_tokens()))
+    return _client
+
+def check_circuit(breaker):
+    """Raise CircuitOpen while the breaker rejects calls"""
+    retry_after = breaker.check()
+    if retry_after is not None:
+        raise CircuitOpen('GitHub is failing; not calling it until the circuit breaker closes',
+                          retry_after=retry_after)
+
+def decode_json(response):
+    """Decode a response body, timed as the json_decode stage"""
+    with timed('json_decode'):
+        return response.json()
+
+def raise_for_upstream(response):
+    """Raise UpstreamError for a response that is neither a success nor a 404"""
+    raise UpstreamError(f'GitHub API returned {response.status_code}',
+                        response.status_code, parse_retry_after(response))
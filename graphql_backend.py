@@ -0,0 +1,134 @@
+import os
+
+from github_client import GITHUB_MAX_PAGES, UpstreamError, decode_json, parse_retry_after, raise_for_upstream
+from records import Repo
+
+# GraphQL backend configuration
+GRAPHQL_REPO_PAGE_SIZE = int(os.environ.get('GRAPHQL_REPO_PAGE_SIZE', '100'))  # Repositories per query, 100 at most
+GRAPHQL_LANGUAGES_PER_REPO = int(os.environ.get('GRAPHQL_LANGUAGES_PER_REPO', '10'))  # Largest languages kept per repo; each adds to the query cost
+
+REPOSITORY_FRAGMENT = '''
+fragment RepositoryFields on Repository {
+  name
+  nameWithOwner
+  stargazerCount
+  forkCount
+  isFork
+  isArchived
+  pushedAt
+  primaryLanguage { name }
+  languages(first: $languages, orderBy: {field: SIZE, direction: DESC}) { edges { size node { name } } }
+}
+'''
+
+REPOSITORIES = '''
+repositories(first: $repos, after: $cursor, privacy: PUBLIC, ownerAffiliations: OWNER,
+             orderBy: {field: NAME, direction: ASC}) {
+  totalCount
+  pageInfo { hasNextPage endCursor }
+  nodes { ...RepositoryFields }
+}
+'''
+
+PROFILE_QUERY = '''
+query UserProfile($login: String!, $repos: Int!, $cursor: String, $languages: Int!) {
+  user(login: $login) {
+    login
+    name
+    avatarUrl
+    bio
+    location
+    company
+    websiteUrl
+    twitterUsername
+    createdAt
+    followers { totalCount }
+    following { totalCount }
+    %s
+    contributionsCollection { contributionCalendar { totalContributions } }
+  }
+}
+''' % REPOSITORIES + REPOSITORY_FRAGMENT
+
+REPOSITORIES_QUERY = '''
+query UserRepositories($login: String!, $repos: Int!, $cursor: String, $languages: Int!) {
+  user(login: $login) {
+    %s
+  }
+}
+''' % REPOSITORIES + REPOSITORY_FRAGMENT
+
+def user_from_node(node):
+    """Shape a GraphQL user like the REST /users/{login} body summarize_user reads"""
+    return {
+        'login': node['login'],
+        'name': node['name'],
+        'avatar_url': node['avatarUrl'],
+        'bio': node['bio'],
+        'location': node['location'],
+        'company': node['company'],
+        'blog': node['websiteUrl'] or '',
+        'twitter_username': node['twitterUsername'],
+        'followers': node['followers']['totalCount'],
+        'following': node['following']['totalCount'],
+        'public_repos': node['repositories']['totalCount'],
+        'created_at': node['createdAt'],
+        'contributions_last_year': node['contributionsCollection']['contributionCalendar']['totalContributions']
+    }
+
+def repo_from_node(node):
+    """Project a GraphQL repository to the same Repo record as records.repo_record"""
+    language = node['primaryLanguage']
+    return Repo(node['name'], node['nameWithOwner'], language['name'] if language else None,
+                node['stargazerCount'], node['forkCount'], node['isFork'], node['isArchived'], node['pushedAt'],
+                {edge['node']['name']: edge['size'] for edge in node['languages']['edges']})
+
+class GraphQLBackend:
+    """Fetches a profile and its repositories with GitHub's GraphQL API.
+
+    One query returns the profile, the first page of repositories with their
+    star and fork counts and language byte sizes, and the contribution
+    calendar total; each further page of repositories costs one more query.
+    The events feed has no GraphQL equivalent and is still fetched over REST.
+    """
+
+    def __init__(self, client, url, page_size=GRAPHQL_REPO_PAGE_SIZE,
+                 languages=GRAPHQL_LANGUAGES_PER_REPO, max_pages=GITHUB_MAX_PAGES):
+        self.client = client
+        self.url = url
+        self.page_size = page_size
+        self.languages = languages
+        self.max_pages = max_pages
+
+    def query(self, query, variables):
+        """Run a query and return its data; NOT_FOUND errors leave the missing node as null"""
+        response = self.client.post(self.url, {'query': query, 'variables': variables})
+        if response.status_code != 200:
+            raise_for_upstream(response)
+        body = decode_json(response)
+        errors = [error for error in body.get('errors') or [] if error.get('type') != 'NOT_FOUND']
+        if errors:
+            if any(error.get('type') == 'RATE_LIMITED' for error in errors):
+                raise UpstreamError('GitHub GraphQL rate limit exceeded', 429, parse_retry_after(response))
+            raise UpstreamError(f'GitHub GraphQL error: {errors[0].get("message")}')
+        return body.get('data') or {}
+
+    def fetch_profile(self, login):
+        """Return (user_data, repos) for a login, or None when the user does not exist"""
+        variables = {'login': login, 'repos': self.page_size, 'cursor': None, 'languages': self.languages}
+        user = self.query(PROFILE_QUERY, variables).get('user')
+        if user is None:
+            return None
+
+        connection = user['repositories']
+        repos = [repo_from_node(node) for node in connection['nodes']]
+        pages = 1
+        while connection['pageInfo']['hasNextPage'] and pages < self.max_pages:
+            variables['cursor'] = connection['pageInfo']['endCursor']
+            page = self.query(REPOSITORIES_QUERY, variables).get('user')
+            if page is None:
+                break
+            connection = page['repositories']
+            repos.extend(repo_from_node(node) for node in connection['nodes'])
+            pages += 1
+        return user_from_node(user), repos
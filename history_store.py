@@ -0,0 +1,206 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+from event_analytics import CONTRIBUTION_KEYS
+from instrumentation import instrument
+from local_data import private_path
+from records import EPOCH_ORDINAL, Event, Repo
+
+# History store configuration
+HISTORY_STORE = os.environ.get('HISTORY_STORE', 'none')  # sqlite keeps every event seen, for all-time stats; none disables
+HISTORY_STORE_PATH = os.environ.get('HISTORY_STORE_PATH')  # Defaults to github-history.sqlite3 in LOCAL_DATA_DIR
+HISTORY_EVENT_PAGES = int(os.environ.get('HISTORY_EVENT_PAGES', '3'))  # Event pages read per refresh; GitHub serves at most 3
+HISTORY_RECENT_DAYS = int(os.environ.get('HISTORY_RECENT_DAYS', '90'))  # Window of the 'recent activities' achievement
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS users ('
+    'login TEXT PRIMARY KEY, profile TEXT NOT NULL, fetched_at REAL NOT NULL, '
+    'last_event_id INTEGER NOT NULL DEFAULT 0, total_events INTEGER NOT NULL DEFAULT 0, '
+    'total_days INTEGER NOT NULL DEFAULT 0, run_end INTEGER, run_length INTEGER NOT NULL DEFAULT 0, '
+    'longest_run INTEGER NOT NULL DEFAULT 0)',
+    'CREATE TABLE IF NOT EXISTS repos ('
+    'login TEXT NOT NULL, full_name TEXT NOT NULL, name TEXT, language TEXT, stargazers_count INTEGER, '
+    'forks_count INTEGER, fork INTEGER, archived INTEGER, pushed_at TEXT, PRIMARY KEY (login, full_name))',
+    'CREATE TABLE IF NOT EXISTS events ('
+    'login TEXT NOT NULL, id INTEGER NOT NULL, type TEXT NOT NULL, created INTEGER NOT NULL, '
+    'commits INTEGER NOT NULL, PRIMARY KEY (login, id))',
+    'CREATE INDEX IF NOT EXISTS events_created ON events (login, created)',
+    'CREATE TABLE IF NOT EXISTS event_days ('
+    'login TEXT NOT NULL, day INTEGER NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (login, day))',
+    'CREATE TABLE IF NOT EXISTS event_hours ('
+    'login TEXT NOT NULL, hour INTEGER NOT NULL, count INTEGER NOT NULL, last_seen INTEGER NOT NULL, '
+    'PRIMARY KEY (login, hour))',
+    'CREATE TABLE IF NOT EXISTS event_types ('
+    'login TEXT NOT NULL, type TEXT NOT NULL, count INTEGER NOT NULL, commits INTEGER NOT NULL, '
+    'PRIMARY KEY (login, type))',
+)
+
+def extend_run(run_end, run_length, longest_run, day):
+    """Streak state after adding a newer active day; longest_run only counts multi-day runs, like calculate_streaks"""
+    run_length = run_length + 1 if run_end is not None and day == run_end + 1 else 1
+    if run_length > 1:
+        longest_run = max(longest_run, run_length)
+    return day, run_length, longest_run
+
+class HistoryStore:
+    """Append-only event log with incrementally maintained rollups, in a local SQLite file.
+
+    GitHub's events feed only reaches back ~90 days, so every refresh appends
+    the events not seen before (deduplicated by id) and folds just those into
+    per-day, per-hour and per-type counts and the streak state. Stats are
+    then read from the rollups, so their cost does not grow with the length
+    of the history, and they keep covering events long gone from the feed.
+    The latest profile and repository rows are stored alongside.
+    """
+
+    def __init__(self, path=HISTORY_STORE_PATH):
+        import sqlite3
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or private_path('github-history.sqlite3'), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        for statement in SCHEMA:
+            self._conn.execute(statement)
+
+    def last_event_id(self, login):
+        """Highest event id stored for login, 0 when none"""
+        with self._lock:
+            row = self._conn.execute('SELECT last_event_id FROM users WHERE login = ?', (login.lower(),)).fetchone()
+        return row[0] if row else 0
+
+    @instrument
+    def ingest(self, login, user_data, repos, events):
+        """Store the profile and repos and append unseen events, updating the rollups in one transaction"""
+        login = login.lower()
+        with self._lock:
+            conn = self._conn
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.execute('INSERT INTO users (login, profile, fetched_at) VALUES (?, ?, ?) '
+                             'ON CONFLICT (login) DO UPDATE SET profile = excluded.profile, '
+                             'fetched_at = excluded.fetched_at', (login, json.dumps(user_data), time.time()))
+                conn.execute('DELETE FROM repos WHERE login = ?', (login,))
+                conn.executemany('INSERT OR REPLACE INTO repos VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)', [
+                    (login, repo.full_name, repo.name, repo.language, repo.stargazers_count, repo.forks_count,
+                     repo.fork, repo.archived, repo.pushed_at) for repo in repos])
+                self._append_events(login, events)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+
+    def _append_events(self, login, events):
+        conn = self._conn
+        added = []
+        for event in events:
+            cursor = conn.execute('INSERT OR IGNORE INTO events VALUES (?, ?, ?, ?, ?)',
+                                  (login, int(event.id), event.type, event.created, event.commits))
+            if cursor.rowcount:
+                added.append(event)
+        if not added:
+            return
+
+        new_days = []
+        for event in added:
+            day = event.created // 86400
+            cursor = conn.execute('INSERT OR IGNORE INTO event_days VALUES (?, ?, 1)', (login, day))
+            if cursor.rowcount:
+                new_days.append(day)
+            else:
+                conn.execute('UPDATE event_days SET count = count + 1 WHERE login = ? AND day = ?', (login, day))
+            conn.execute('INSERT INTO event_hours VALUES (?, ?, 1, ?) ON CONFLICT (login, hour) DO UPDATE SET '
+                         'count = count + 1, last_seen = max(last_seen, excluded.last_seen)',
+                         (login, event.created // 3600 % 24, event.created))
+            conn.execute('INSERT INTO event_types VALUES (?, ?, 1, ?) ON CONFLICT (login, type) DO UPDATE SET '
+                         'count = count + 1, commits = commits + excluded.commits',
+                         (login, event.type, event.commits if event.type == 'PushEvent' else 0))
+
+        run_end, run_length, longest_run, total_days = conn.execute(
+            'SELECT run_end, run_length, longest_run, total_days FROM users WHERE login = ?', (login,)).fetchone()
+        new_days.sort()
+        if run_end is not None and new_days and new_days[0] < run_end:
+            # A day older than the newest one appeared; rebuild the streak state from the day rollup
+            run_end, run_length, longest_run = None, 0, 0
+            new_days = [row[0] for row in conn.execute(
+                'SELECT day FROM event_days WHERE login = ? ORDER BY day', (login,))]
+            total_days = 0
+        for day in new_days:
+            run_end, run_length, longest_run = extend_run(run_end, run_length, longest_run, day)
+        conn.execute(
+            'UPDATE users SET last_event_id = max(last_event_id, ?), total_events = total_events + ?, '
+            'total_days = ?, run_end = ?, run_length = ?, longest_run = ? WHERE login = ?',
+            (max(int(event.id) for event in added), len(added), total_days + len(new_days),
+             run_end, run_length, longest_run, login))
+
+    def load_profile(self, login):
+        """(user_data, repos, fetched_at) as last stored for login, or None"""
+        with self._lock:
+            row = self._conn.execute('SELECT profile, fetched_at FROM users WHERE login = ?',
+                                     (login.lower(),)).fetchone()
+            if row is None:
+                return None
+            repos = self._conn.execute(
+                'SELECT name, full_name, language, stargazers_count, forks_count, fork, archived, pushed_at '
+                'FROM repos WHERE login = ? ORDER BY rowid', (login.lower(),)).fetchall()
+        repos = [Repo(name, full_name, language, stars, forks, bool(fork), bool(archived), pushed_at)
+                 for name, full_name, language, stars, forks, fork, archived, pushed_at in repos]
+        return json.loads(row[0]), repos, row[1]
+
+    @instrument
+    def event_stats(self, login, today=None):
+        """Activity, contribution, activity time and streak stats over every stored event, shaped like aggregate_events"""
+        login = login.lower()
+        with self._lock:
+            user = self._conn.execute('SELECT total_events, total_days, run_end, run_length, longest_run '
+                                      'FROM users WHERE login = ?', (login,)).fetchone()
+            types = self._conn.execute('SELECT type, count, commits FROM event_types WHERE login = ? '
+                                       'ORDER BY count DESC, type', (login,)).fetchall()
+            hours = self._conn.execute('SELECT hour, count FROM event_hours WHERE login = ? '
+                                       'ORDER BY count DESC, last_seen DESC LIMIT 5', (login,)).fetchall()
+        total_events, total_days, run_end, run_length, longest_run = user or (0, 0, None, 0, 0)
+
+        contributions = {'commits': 0, 'pull_requests': 0, 'issues': 0, 'reviews': 0}
+        for event_type, count, commits in types:
+            if event_type == 'PushEvent':
+                contributions['commits'] += commits
+            elif event_type in CONTRIBUTION_KEYS:
+                contributions[CONTRIBUTION_KEYS[event_type]] += count
+        contributions['total_contributions'] = sum(contributions.values())
+
+        streak = {'current_streak': 0, 'longest_streak': 0, 'total_days': 0}
+        if total_events:
+            today = (today or datetime.now().date()).toordinal() - EPOCH_ORDINAL
+            current_streak = run_length if today - run_end <= 1 else 0
+            streak = {'current_streak': current_streak, 'longest_streak': max(longest_run, current_streak),
+                      'total_days': total_days}
+        return {
+            'activity': {event_type: count for event_type, count, _ in types},
+            'contributions': contributions,
+            'activity_times': [{'hour': hour, 'count': count} for hour, count in hours],
+            'streak': streak
+        }
+
+    def recent_events(self, login, days=HISTORY_RECENT_DAYS, limit=300):
+        """Newest stored events within the last days, like the window the events feed returns"""
+        since = int(time.time()) - days * 86400
+        with self._lock:
+            rows = self._conn.execute('SELECT id, type, created, commits FROM events WHERE login = ? AND created >= ? '
+                                      'ORDER BY created DESC LIMIT ?', (login.lower(), since, limit)).fetchall()
+        return [Event(str(event_id), event_type, created, commits) for event_id, event_type, created, commits in rows]
+
+    def stats(self):
+        with self._lock:
+            users, events = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(total_events), 0) FROM users').fetchone()
+        return {'users': users, 'events': events}
+
+def create_history_store(backend=HISTORY_STORE):
+    """Build the history store selected by HISTORY_STORE, or None when disabled"""
+    if backend == 'none':
+        return None
+    if backend == 'sqlite':
+        return HistoryStore()
+    raise ValueError(f'Unknown HISTORY_STORE: {backend}')
@@ -0,0 +1,70 @@
+import gzip
+import hashlib
+import os
+
+try:
+    import brotli
+except ImportError:  # Optional: install brotli to prefer br over gzip
+    brotli = None
+
+# Response caching and compression configuration
+API_MAX_AGE = int(os.environ.get('API_MAX_AGE', '60'))  # Seconds browsers reuse a response
+API_CDN_MAX_AGE = int(os.environ.get('API_CDN_MAX_AGE', '300'))  # s-maxage honored by the Vercel edge cache
+API_STALE_WHILE_REVALIDATE = int(os.environ.get('API_STALE_WHILE_REVALIDATE', '600'))  # Seconds a stale copy may be served while refreshing
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))  # Bytes; smaller bodies are sent as-is
+COMPRESSION_LEVEL = int(os.environ.get('COMPRESSION_LEVEL', '6'))  # gzip level 1-9, also used as brotli quality
+
+CACHE_CONTROL = (f'public, max-age={API_MAX_AGE}, s-maxage={API_CDN_MAX_AGE}, '
+                 f'stale-while-revalidate={API_STALE_WHILE_REVALIDATE}')
+
+def cacheable(view):
+    """Mark a view whose successful GET responses get a strong ETag, 304s and Cache-Control"""
+    view.http_cacheable = True
+    return view
+
+def negotiate_encoding(response):
+    """Pick br or gzip for a response body large enough to be worth compressing"""
+    if 'Content-Encoding' in response.headers or (response.content_length or 0) < COMPRESSION_MIN_SIZE:
+        return None
+    from flask import request
+    response.vary.add('Accept-Encoding')
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+def compress(response, encoding):
+    data = response.get_data()
+    if encoding == 'br':
+        response.set_data(brotli.compress(data, quality=COMPRESSION_LEVEL))
+    else:
+        response.set_data(gzip.compress(data, COMPRESSION_LEVEL, mtime=0))
+    response.headers['Content-Encoding'] = encoding
+
+def apply_http_caching(response):
+    """after_request hook: ETag, 304 and Cache-Control for @cacheable views, then compression.
+
+    The ETag hashes the uncompressed body and carries the chosen encoding as a
+    suffix, so each encoded representation has its own strong validator.
+    """
+    # Imported per call so asgi_app can share this module's settings without loading Flask
+    from flask import current_app, request
+    if request.method not in ('GET', 'HEAD') or response.is_streamed or response.direct_passthrough:
+        return response
+
+    encoding = negotiate_encoding(response) if response.status_code == 200 else None
+    view = current_app.view_functions.get(request.endpoint)
+    if response.status_code == 200 and getattr(view, 'http_cacheable', False):
+        digest = hashlib.blake2b(response.get_data(), digest_size=16).hexdigest()
+        response.set_etag(f'{digest}-{encoding}' if encoding else digest)
+        if 'Cache-Control' not in response.headers:
+            response.headers['Cache-Control'] = CACHE_CONTROL
+        response.make_conditional(request)
+        if response.status_code == 304:
+            return response
+
+    if encoding:
+        compress(response, encoding)
+    return response
@@ -0,0 +1,156 @@
+import bisect
+import contextvars
+import functools
+import os
+import threading
+import time
+
+# Stage timing configuration
+STAGE_BUCKETS = tuple(float(bound) for bound in os.environ.get(
+    'STAGE_BUCKETS', '0.0005,0.001,0.0025,0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10').split(','))  # Seconds
+
+METRIC_PREFIX = 'github_metrics'
+
+# Stage timings of the request being handled; a list so pool threads running
+# in a copy of the request's context append to the same one
+_request_timings = contextvars.ContextVar('request_timings', default=None)
+
+class Histogram:
+    """Bucket counts for one stage; the last bucket is +Inf"""
+
+    __slots__ = ('counts', 'sum', 'count')
+
+    def __init__(self, size):
+        self.counts = [0] * (size + 1)
+        self.sum = 0.0
+        self.count = 0
+
+class StageMetrics:
+    """Process-wide stage latency histograms and upstream response counters"""
+
+    def __init__(self, buckets=STAGE_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._upstream = {}
+
+    def observe(self, stage, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(len(self.buckets))
+            histogram.counts[index] += 1
+            histogram.sum += seconds
+            histogram.count += 1
+
+    def count_upstream(self, status):
+        with self._lock:
+            self._upstream[status] = self._upstream.get(status, 0) + 1
+
+    def render(self, caches=None):
+        """Prometheus text exposition; caches maps a cache name to its stats() dict"""
+        with self._lock:
+            histograms = {stage: (list(h.counts), h.sum, h.count) for stage, h in self._histograms.items()}
+            upstream = dict(self._upstream)
+
+        name = f'{METRIC_PREFIX}_stage_duration_seconds'
+        lines = [f'# HELP {name} Time spent in each request stage.', f'# TYPE {name} histogram']
+        for stage, (counts, total, count) in sorted(histograms.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+
+        name = f'{METRIC_PREFIX}_upstream_requests_total'
+        lines += [f'# HELP {name} GitHub API responses by status code.', f'# TYPE {name} counter']
+        for status, count in sorted(upstream.items(), key=lambda item: str(item[0])):
+            lines.append(f'{name}{{status="{status}"}} {count}')
+
+        lookups = f'{METRIC_PREFIX}_cache_lookups_total'
+        ratio = f'{METRIC_PREFIX}_cache_hit_ratio'
+        entries = f'{METRIC_PREFIX}_cache_entries'
+        lines += [f'# HELP {lookups} Cache lookups by result.', f'# TYPE {lookups} counter']
+        for cache, stats in sorted((caches or {}).items()):
+            for result in ('hits', 'stale', 'misses', 'revalidations'):
+                if result in stats:
+                    lines.append(f'{lookups}{{cache="{cache}",result="{result}"}} {stats[result]}')
+        lines += [f'# HELP {ratio} Share of lookups served from cache.', f'# TYPE {ratio} gauge']
+        for cache, stats in sorted((caches or {}).items()):
+            if 'hit_rate' in stats:
+                hit_rate = stats['hit_rate']
+            else:
+                total = stats['hits'] + stats['misses']
+                hit_rate = stats['hits'] / total if total else 0.0
+            lines.append(f'{ratio}{{cache="{cache}"}} {hit_rate}')
+        lines += [f'# HELP {entries} Entries currently cached.', f'# TYPE {entries} gauge']
+        for cache, stats in sorted((caches or {}).items()):
+            lines.append(f'{entries}{{cache="{cache}"}} {stats["entries"]}')
+        return '\n'.join(lines) + '\n'
+
+metrics = StageMetrics()
+
+def record(stage, seconds):
+    """Add a stage duration to the histograms and to the current request's timings"""
+    metrics.observe(stage, seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+class timed:
+    """Context manager that records the duration of its block as a stage"""
+
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.stage, time.perf_counter() - self.start)
+
+def instrument(func):
+    """Decorator recording each call of func as a stage named after it"""
+    stage = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(stage, time.perf_counter() - start)
+
+    return wrapper
+
+def submit_in_context(executor, func, *args):
+    """executor.submit(func, *args), run in a copy of the caller's context so stage timings reach its request"""
+    return executor.submit(contextvars.copy_context().run, func, *args)
+
+def begin_request():
+    """before_request hook: start collecting stage timings for this request"""
+    _request_timings.set([])
+
+def server_timing():
+    """Server-Timing entries with this request's total per stage, or None when nothing was timed"""
+    timings = _request_timings.get()
+    if not timings:
+        return None
+    totals = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ', '.join(f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in totals.items())
+
+def add_server_timing(response):
+    """after_request hook: append this request's stage totals to Server-Timing"""
+    entries = server_timing()
+    if entries:
+        existing = response.headers.get('Server-Timing')
+        response.headers['Server-Timing'] = f'{existing}, {entries}' if existing else entries
+    return response
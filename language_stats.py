@@ -0,0 +1,135 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from github_client import UpstreamError
+from instrumentation import submit_in_context
+
+logger = logging.getLogger(__name__)
+
+# Byte-weighted language statistics configuration
+LANGUAGE_STATS_MODE = os.environ.get('LANGUAGE_STATS_MODE', 'primary')  # 'bytes' adds language_bytes from /repos/{owner}/{repo}/languages
+LANGUAGE_FETCH_CONCURRENCY = int(os.environ.get('LANGUAGE_FETCH_CONCURRENCY', '8'))  # /languages calls in flight, shared across requests
+LANGUAGE_SKIP_FORKS = os.environ.get('LANGUAGE_SKIP_FORKS', 'true').lower() in ('1', 'true', 'yes')
+LANGUAGE_SKIP_ARCHIVED = os.environ.get('LANGUAGE_SKIP_ARCHIVED', 'false').lower() in ('1', 'true', 'yes')
+LANGUAGE_CACHE_MAX_ENTRIES = int(os.environ.get('LANGUAGE_CACHE_MAX_ENTRIES', '10000'))  # Per-repo results kept
+LANGUAGE_AGGREGATE_MAX_ENTRIES = int(os.environ.get('LANGUAGE_AGGREGATE_MAX_ENTRIES', '512'))  # Per-user totals kept
+
+# Statuses of a /languages call that only concern that repository, e.g. 409 for an empty one
+SKIPPED_STATUSES = (404, 409, 422)
+
+class LRUCache:
+    """Thread-safe LRU map without expiry, for entries whose key changes when they go stale"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0}
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self._counters['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters['hits'] += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+        return stats
+
+class LanguageStats:
+    """Bytes of code per language summed over a user's repositories.
+
+    Each repository's breakdown is cached under (full_name, pushed_at), so a
+    repository is fetched again only after new commits are pushed to it.
+    Totals are cached under a digest of every counted repository's key, which
+    lets a repeat request skip even the per-repo lookups. Missing breakdowns
+    are fetched on a pool shared by all requests, bounding the calls in flight.
+    Breakdowns a fetch backend already provides (Repo.language_bytes) are used
+    as-is. A repository GitHub answers 404, 409 or 422 for is left out of
+    the totals, which are then partial and not cached, so the next request
+    tries it again. Any other failure, like a rate limit, fails the call.
+    """
+
+    def __init__(self, fetch_languages, concurrency=LANGUAGE_FETCH_CONCURRENCY, skip_forks=LANGUAGE_SKIP_FORKS,
+                 skip_archived=LANGUAGE_SKIP_ARCHIVED, max_repos=LANGUAGE_CACHE_MAX_ENTRIES,
+                 max_aggregates=LANGUAGE_AGGREGATE_MAX_ENTRIES):
+        self.fetch_languages = fetch_languages
+        self.skip_forks = skip_forks
+        self.skip_archived = skip_archived
+        self.repos = LRUCache(max_repos)
+        self.aggregates = LRUCache(max_aggregates)
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='repo-languages')
+
+    def counted(self, repo):
+        return not (self.skip_forks and repo.fork) and not (self.skip_archived and repo.archived)
+
+    def aggregate(self, repos):
+        """(bytes per language across the counted repos, largest first; whether some repo was left out)"""
+        repos = [repo for repo in repos if self.counted(repo)]
+        digest = hashlib.blake2b(digest_size=16)
+        for repo in repos:
+            digest.update(f'{repo.full_name}\0{repo.pushed_at}\0'.encode())
+        key = digest.hexdigest()
+        totals = self.aggregates.get(key)
+        if totals is not None:
+            return totals, False
+
+        totals = {}
+        results = self.repo_languages(repos)
+        for sizes in results:
+            for language, size in (sizes or {}).items():
+                totals[language] = totals.get(language, 0) + size
+        totals = dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+        partial = None in results
+        if not partial:
+            self.aggregates.set(key, totals)
+        return totals, partial
+
+    def repo_languages(self, repos):
+        """Each repo's language breakdown, None where GitHub has none; fetches only those not cached at pushed_at"""
+        results = [repo.language_bytes for repo in repos]
+        missing = []
+        for index, repo in enumerate(repos):
+            if results[index] is None:
+                results[index] = self.repos.get((repo.full_name, repo.pushed_at))
+                if results[index] is None:
+                    missing.append(index)
+
+        futures = [(index, submit_in_context(self._executor, self.fetch_languages, repos[index].full_name))
+                   for index in missing]
+        error = None
+        for index, future in futures:
+            try:
+                results[index] = future.result()
+            except Exception as exc:
+                if isinstance(exc, UpstreamError) and exc.status_code in SKIPPED_STATUSES:
+                    logger.warning('No language breakdown for %s (GitHub answered %s); leaving it out',
+                                   repos[index].full_name, exc.status_code)
+                else:
+                    # Keep what did arrive so a retry only refetches the failures
+                    error = error or exc
+                continue
+            self.repos.set((repos[index].full_name, repos[index].pushed_at), results[index])
+        if error is not None:
+            raise error
+        return results
+
+    def stats(self):
+        return {'repos': self.repos.stats(), 'aggregates': self.aggregates.stats()}
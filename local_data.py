@@ -0,0 +1,23 @@
+import getpass
+import os
+import stat
+import tempfile
+
+# Local data configuration
+LOCAL_USER = os.getuid() if hasattr(os, 'getuid') else getpass.getuser()
+LOCAL_DATA_DIR = os.environ.get('LOCAL_DATA_DIR', os.path.join(tempfile.gettempdir(), f'github-metrics-{LOCAL_USER}'))  # Default home of the SQLite files
+
+def private_path(name, directory=None):
+    """Path of name in LOCAL_DATA_DIR (or directory), creating it readable by this user only.
+
+    The default directory is under the shared temporary directory, so one
+    that other users could have created or can write to is refused rather
+    than used.
+    """
+    directory = directory or LOCAL_DATA_DIR
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    info = os.lstat(directory)
+    if not stat.S_ISDIR(info.st_mode) or info.st_mode & 0o077 or \
+            (hasattr(os, 'getuid') and info.st_uid != os.getuid()):
+        raise RuntimeError(f'{directory} must be a directory that only this user can access')
+    return os.path.join(directory, name)
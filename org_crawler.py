@@ -0,0 +1,198 @@
+import heapq
+import json
+import os
+import re
+import tempfile
+import time
+
+from concurrent_fetch import fan_out
+from github_client import UpstreamError
+
+# Organization crawl configuration
+ORG_CRAWL_BATCH = int(os.environ.get('ORG_CRAWL_BATCH', '50'))  # Members processed per /api/org call
+ORG_CRAWL_MAX_MEMBERS = int(os.environ.get('ORG_CRAWL_MAX_MEMBERS', '10000'))
+ORG_CRAWL_TTL = float(os.environ.get('ORG_CRAWL_TTL', '3600'))  # Seconds a finished crawl is served before recrawling
+ORG_CRAWL_DIR = os.environ.get('ORG_CRAWL_DIR', os.path.join(tempfile.gettempdir(), 'org-crawls'))
+ORG_LEADERBOARD_SIZE = int(os.environ.get('ORG_LEADERBOARD_SIZE', '10'))
+
+ORG_NAME = re.compile(r'^[A-Za-z0-9](?:[A-Za-z0-9-]{0,38})$')
+
+# Per-member figures summed into the org totals and ranked on the leaderboards
+MEMBER_COUNTERS = ('stars', 'commits', 'pull_requests', 'issues', 'reviews', 'total_contributions')
+LEADERBOARDS = MEMBER_COUNTERS + ('current_streak', 'longest_streak')
+
+class OrgCrawl:
+    """Resumable crawl state for one org, small enough to checkpoint after every step.
+
+    Only running totals and one row of leaderboard figures per member are
+    kept; member repos and events are dropped as soon as they are summarized.
+    """
+
+    def __init__(self, org):
+        self.org = org
+        self.started_at = time.time()
+        self.updated_at = self.started_at
+        self.members = []
+        self.member_page = 1  # Next page to list, None once every page is listed
+        self.repo_page = 1
+        self.next_member = 0
+        self.repos = {'count': 0, 'total_stars': 0, 'total_forks': 0, 'languages': {}}
+        self.totals = dict.fromkeys(MEMBER_COUNTERS, 0)
+        self.member_languages = {}
+        self.rows = {}
+        self.errors = {}
+        self.retry_after = None
+
+    @property
+    def complete(self):
+        return self.member_page is None and self.repo_page is None and self.next_member >= len(self.members)
+
+    def to_dict(self):
+        return dict(vars(self))
+
+    @classmethod
+    def from_dict(cls, data):
+        crawl = cls(data['org'])
+        vars(crawl).update(data)
+        return crawl
+
+class CheckpointStore:
+    """One JSON checkpoint file per org, replaced atomically after each step"""
+
+    def __init__(self, directory=ORG_CRAWL_DIR):
+        self.directory = directory
+
+    def path(self, org):
+        return os.path.join(self.directory, f'{org.lower()}.json')
+
+    def load(self, org):
+        try:
+            with open(self.path(org), encoding='utf-8') as f:
+                return OrgCrawl.from_dict(json.load(f))
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+
+    def save(self, crawl):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(crawl.org)
+        with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+            json.dump(crawl.to_dict(), f)
+        os.replace(f'{path}.tmp', path)
+
+class OrgCrawler:
+    """Advances an org crawl one bounded step per call.
+
+    Each step lists at most one more page of members and of repos, then
+    summarizes the next batch of members on the shared batch pool. When the
+    rate limit budget runs out the step stops early and the unfinished members
+    are retried by the next call, so a crawl of thousands of members proceeds
+    across many requests (or process restarts) without holding more than a
+    batch of raw data at a time.
+    """
+
+    def __init__(self, fetch_page, summarize_member, store=None, batch=ORG_CRAWL_BATCH,
+                 max_members=ORG_CRAWL_MAX_MEMBERS, ttl=ORG_CRAWL_TTL):
+        self.fetch_page = fetch_page
+        self.summarize_member = summarize_member
+        self.store = store or CheckpointStore()
+        self.batch = batch
+        self.max_members = max_members
+        self.ttl = ttl
+
+    def step(self, org, restart=False):
+        """Run one crawl step and return the crawl, or None when the org does not exist"""
+        crawl = None if restart else self.store.load(org)
+        if crawl is not None and crawl.complete and time.time() - crawl.updated_at >= self.ttl:
+            crawl = None
+        if crawl is None:
+            crawl = OrgCrawl(org)
+        elif crawl.complete:
+            return crawl
+
+        crawl.retry_after = None
+        try:
+            if crawl.member_page is not None and not self.list_members(crawl):
+                return None
+            if crawl.repo_page is not None:
+                self.list_repos(crawl)
+            self.process_members(crawl)
+        except UpstreamError as error:
+            if not error.retry_later:
+                raise
+            crawl.retry_after = error.retry_after
+
+        crawl.updated_at = time.time()
+        self.store.save(crawl)
+        return crawl
+
+    def list_members(self, crawl):
+        page = self.fetch_page(crawl.org, 'members', crawl.member_page)
+        if page is None:
+            return False
+        logins, has_next = page
+        crawl.members.extend(logins[:self.max_members - len(crawl.members)])
+        has_next = has_next and len(crawl.members) < self.max_members
+        crawl.member_page = crawl.member_page + 1 if has_next else None
+        return True
+
+    def list_repos(self, crawl):
+        page = self.fetch_page(crawl.org, 'repos', crawl.repo_page)
+        repos, has_next = page if page is not None else ([], False)
+        stats = crawl.repos
+        for repo in repos:
+            stats['count'] += 1
+            stats['total_stars'] += repo.stargazers_count
+            stats['total_forks'] += repo.forks_count
+            if repo.language:
+                stats['languages'][repo.language] = stats['languages'].get(repo.language, 0) + 1
+        crawl.repo_page = crawl.repo_page + 1 if has_next else None
+
+    def process_members(self, crawl):
+        batch = crawl.members[crawl.next_member:crawl.next_member + self.batch]
+        for login, summary, error in fan_out(batch, self.summarize_member):
+            if isinstance(error, UpstreamError) and error.retry_later:
+                # Resume from this member next time; later results are refetched (cheaply, from cache)
+                raise error
+            if error is not None:
+                crawl.errors[login] = str(error) if isinstance(error, UpstreamError) else 'Internal error'
+            elif summary is not None:
+                self.merge(crawl, login, summary)
+            crawl.next_member += 1
+
+    def merge(self, crawl, login, summary):
+        for name in MEMBER_COUNTERS:
+            crawl.totals[name] += summary[name]
+        for language, count in summary['languages'].items():
+            crawl.member_languages[language] = crawl.member_languages.get(language, 0) + count
+        crawl.rows[login] = [summary[name] for name in LEADERBOARDS]
+
+def leaderboards(crawl, size=ORG_LEADERBOARD_SIZE):
+    """Top members by each figure in LEADERBOARDS"""
+    boards = {}
+    for index, name in enumerate(LEADERBOARDS):
+        top = heapq.nlargest(size, crawl.rows.items(), key=lambda item: item[1][index])
+        boards[name] = [{'login': login, 'value': row[index]} for login, row in top if row[index]]
+    return boards
+
+def org_report(crawl):
+    """Org-level aggregates for a crawl, complete or partial"""
+    return {
+        'org': crawl.org,
+        'complete': crawl.complete,
+        'progress': {
+            'members_listed': crawl.member_page is None,
+            'repos_listed': crawl.repo_page is None,
+            'members_found': len(crawl.members),
+            'members_processed': crawl.next_member,
+            'members_failed': len(crawl.errors)
+        },
+        'repositories': crawl.repos,
+        'members': {
+            'totals': crawl.totals,
+            'languages': crawl.member_languages
+        },
+        'leaderboards': leaderboards(crawl),
+        'errors': crawl.errors,
+        'started_at': crawl.started_at,
+        'updated_at': crawl.updated_at
+    }
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+
+# Rate limit scheduler configuration
+GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN', '')  # Optional: Set for higher rate limits
+GITHUB_TOKENS = os.environ.get('GITHUB_TOKENS', '')  # Optional: Comma-separated pool, used instead of GITHUB_TOKEN
+GITHUB_RATE_LIMIT_RESERVE = int(os.environ.get('GITHUB_RATE_LIMIT_RESERVE', '10'))  # Calls held back per token
+GITHUB_RATE_LIMIT_MAX_WAIT = float(os.environ.get('GITHUB_RATE_LIMIT_MAX_WAIT', '5'))  # Seconds to queue for a reset
+
+class BudgetExhausted(Exception):
+    """Raised when every token is at its reserve and no reset is due soon enough"""
+
+    def __init__(self, retry_after=None):
+        super().__init__('GitHub rate limit budget exhausted')
+        self.retry_after = retry_after
+
+class TokenBudget:
+    """Rate limit state for one token, as last reported by GitHub"""
+
+    __slots__ = ('token', 'label', 'limit', 'remaining', 'reset', 'in_flight')
+
+    def __init__(self, token, label='anonymous'):
+        self.token = token
+        # Shown by the public /api/rate-limit, so it must not reveal any part of the token
+        self.label = label
+        self.limit = None
+        self.remaining = None  # Unknown until the first response
+        self.reset = None
+        self.in_flight = 0
+
+    def headroom(self, now):
+        """Calls we can still start with this token, counting calls already in flight"""
+        if self.remaining is None or (self.reset is not None and self.reset <= now):
+            return float('inf')
+        return self.remaining - self.in_flight
+
+    def update(self, headers):
+        remaining = headers.get('X-RateLimit-Remaining')
+        # GraphQL and search have budgets of their own; only the core REST budget is scheduled
+        if remaining is None or headers.get('X-RateLimit-Resource', 'core') != 'core':
+            return
+        self.remaining = int(remaining)
+        self.limit = int(headers.get('X-RateLimit-Limit', self.limit or 0))
+        reset = headers.get('X-RateLimit-Reset')
+        self.reset = int(reset) if reset else None
+
+class TokenPool:
+    """Spreads GitHub calls across tokens and throttles before any budget runs out.
+
+    acquire() hands out the token with the most headroom. When every token
+    is down to its reserve, callers queue until the earliest reset if it is
+    within max_wait, and otherwise fail fast with BudgetExhausted.
+    """
+
+    def __init__(self, tokens, reserve=GITHUB_RATE_LIMIT_RESERVE, max_wait=GITHUB_RATE_LIMIT_MAX_WAIT):
+        self.budgets = [TokenBudget(token, f'token-{index}') for index, token in enumerate(tokens)] or \
+            [TokenBudget(None)]
+        self.reserve = reserve
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+
+    def acquire(self, block=True):
+        """Reserve a call on the best token; block=False raises BudgetExhausted instead of queueing"""
+        deadline = time.time() + self.max_wait
+        with self._cond:
+            while True:
+                now = time.time()
+                budget = max(self.budgets, key=lambda b: (b.headroom(now), -b.in_flight))
+                if budget.headroom(now) > self.reserve:
+                    budget.in_flight += 1
+                    return budget
+
+                resets = [b.reset for b in self.budgets if b.reset is not None]
+                wake = min(resets) if resets else None
+                if not block or wake is None or wake > deadline:
+                    raise BudgetExhausted(max(wake - now, 0) if wake is not None else None)
+                # Woken early when an in-flight call finishes and frees headroom
+                self._cond.wait(max(wake - now, 0.01))
+
+    def release(self, budget, headers=None):
+        with self._cond:
+            budget.in_flight -= 1
+            if headers is not None:
+                budget.update(headers)
+            self._cond.notify_all()
+
+    def headroom(self):
+        """Calls the best token can still start before reaching its reserve"""
+        with self._cond:
+            now = time.time()
+            return max(budget.headroom(now) for budget in self.budgets) - self.reserve
+
+    def stats(self):
+        with self._cond:
+            return [{
+                'token': budget.label,
+                'limit': budget.limit,
+                'remaining': budget.remaining,
+                'reset': budget.reset,
+                'in_flight': budget.in_flight
+            } for budget in self.budgets]
+
+def configured_tokens():
+    """Tokens from GITHUB_TOKENS, falling back to the single GITHUB_TOKEN"""
+    tokens = [token.strip() for token in GITHUB_TOKENS.split(',') if token.strip()]
+    return tokens or ([GITHUB_TOKEN] if GITHUB_TOKEN else [])
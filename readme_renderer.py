@@ -0,0 +1,155 @@
+import os
+import threading
+from collections import OrderedDict, namedtuple
+from string import Formatter
+
+# README rendering configuration
+README_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'readme')
+README_RENDER_CACHE_SIZE = int(os.environ.get('README_RENDER_CACHE_SIZE', '1024'))  # Rendered READMEs kept
+
+README_TEMPLATES = ('default', 'minimal', 'detailed', 'badges')
+
+def _bio_line(u):
+    bio = u.get('bio', '')
+    return f"*{bio}*\n\n" if bio else ''
+
+def _location_line(u):
+    location = u.get('location', '')
+    return f"📍 {location}\n\n" if location else ''
+
+def _language_badges(languages):
+    return ''.join(
+        f'![{lang}](https://img.shields.io/badge/-{lang}-blue?style=flat-square) '
+        for lang in list(languages.keys())[:5]
+    )
+
+def _top_language_lines(languages):
+    sorted_langs = sorted(languages.items(), key=lambda x: x[1], reverse=True)[:5]
+    return ''.join(f"- {lang}: {count} repositories\n" for lang, count in sorted_langs)
+
+def _achievement_lines(achievements):
+    return ''.join(
+        f"- {achievement.get('icon', '🏅')} {achievement.get('name', 'Achievement')}: {achievement.get('description', '')}\n"
+        for achievement in achievements[:5]
+    )
+
+def _website_badge(u):
+    blog = u.get('blog')
+    if not blog:
+        return ''
+    return f"[![Website](https://img.shields.io/badge/Website-{blog}-blue?style=for-the-badge&logo=google-chrome)]({blog})\n"
+
+def _twitter_badge(u):
+    twitter = u.get('twitter_username')
+    if not twitter:
+        return ''
+    return f"[![Twitter](https://img.shields.io/badge/Twitter-{twitter}-blue?style=for-the-badge&logo=twitter)](https://twitter.com/{twitter})\n"
+
+# The inputs a template renders from, passed to every placeholder getter
+RenderInputs = namedtuple('RenderInputs', 'u languages total_stars total_forks contributions streak achievements')
+
+# Getter for each template placeholder, reading it from the RenderInputs
+PLACEHOLDERS = {
+    'username': lambda i: i.u['login'],
+    'name': lambda i: i.u.get('name', i.u['login']),
+    'bio': lambda i: i.u.get('bio', ''),
+    'location': lambda i: i.u.get('location', ''),
+    'company': lambda i: i.u.get('company', 'N/A'),
+    'website': lambda i: i.u.get('blog', 'N/A'),
+    'public_repos': lambda i: i.u['public_repos'],
+    'followers': lambda i: i.u['followers'],
+    'following': lambda i: i.u['following'],
+    'total_stars': lambda i: i.total_stars,
+    'total_forks': lambda i: i.total_forks,
+    'current_streak': lambda i: i.streak.get('current_streak', 0),
+    'longest_streak': lambda i: i.streak.get('longest_streak', 0),
+    'total_contributions': lambda i: i.contributions.get('total_contributions', 0),
+    'bio_line': lambda i: _bio_line(i.u),
+    'location_line': lambda i: _location_line(i.u),
+    'language_badges': lambda i: _language_badges(i.languages),
+    'top_language_lines': lambda i: _top_language_lines(i.languages),
+    'achievement_lines': lambda i: _achievement_lines(i.achievements),
+    'website_badge': lambda i: _website_badge(i.u),
+    'twitter_badge': lambda i: _twitter_badge(i.u),
+}
+
+class ReadmeTemplate:
+    """A README template parsed once into its literal pieces and the placeholder getters between them.
+
+    A placeholder used several times has one getter, evaluated once per render.
+    """
+
+    __slots__ = ('name', 'getters', 'pieces')
+
+    def __init__(self, name, source):
+        self.name = name
+        fields, pieces = [], []
+        for literal, field, _, _ in Formatter().parse(source):
+            if field and field not in fields:
+                fields.append(field)
+            # (literal, index of the placeholder value that follows it, or None at the end)
+            pieces.append((literal, fields.index(field) if field else None))
+        self.getters = tuple(PLACEHOLDERS[field] for field in fields)
+        self.pieces = tuple(pieces)
+
+    def render(self, inputs):
+        values = [str(getter(inputs)) for getter in self.getters]
+        return ''.join([literal + values[index] if index is not None else literal for literal, index in self.pieces])
+
+class ReadmeRenderer:
+    """Renders README templates, each compiled on its first render, memoizing output by a key of their inputs"""
+
+    def __init__(self, template_dir=README_TEMPLATE_DIR, cache_size=README_RENDER_CACHE_SIZE):
+        self.template_dir = template_dir
+        self.templates = {}
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0}
+
+    def compiled(self, template):
+        """The compiled template, compiling it on first use so cold starts only pay for templates they render"""
+        compiled = self.templates.get(template)
+        if compiled is None:
+            if template not in README_TEMPLATES:
+                raise KeyError(template)
+            with open(os.path.join(self.template_dir, f'{template}.md'), encoding='utf-8') as f:
+                compiled = ReadmeTemplate(template, f.read())
+            # Two threads compiling the same template at once keep whichever finishes last; both are identical
+            self.templates[template] = compiled
+        return compiled
+
+    def render(self, template, user_data, languages, total_stars, total_forks,
+               contributions=None, streak=None, achievements=None, key=None):
+        """Render a template, reusing the previous output for the same key.
+
+        key identifies the inputs (a snapshot's digest), so a hit returns
+        without reading them; without a key the template is always rendered.
+        """
+        compiled = self.compiled(template)
+        if key is not None:
+            key = (template, key)
+            with self._lock:
+                readme = self._cache.get(key)
+                if readme is not None:
+                    self._cache.move_to_end(key)
+                    self._counters['hits'] += 1
+                    return readme
+                self._counters['misses'] += 1
+
+        readme = compiled.render(RenderInputs(user_data, languages, total_stars, total_forks,
+                                              contributions or {}, streak or {}, achievements or []))
+        if key is not None:
+            with self._lock:
+                self._cache[key] = readme
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return readme
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._cache)
+        return stats
+
+renderer = ReadmeRenderer()
@@ -0,0 +1,48 @@
+from collections import namedtuple
+from datetime import date
+
+# Day number of 1970-01-01, for turning epoch days back into dates
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+# Repository fields kept after decoding; the rest of each repo object is dropped
+REPO_FIELDS = ('name', 'full_name', 'language', 'stargazers_count', 'forks_count', 'fork', 'archived', 'pushed_at')
+
+class Repo(namedtuple('Repo', REPO_FIELDS + ('language_bytes',), defaults=(None,))):
+    """The repository fields the calculators read.
+
+    language_bytes maps language to byte size when the fetch backend provides
+    it (the GraphQL backend does) and is None otherwise.
+    """
+
+    __slots__ = ()
+
+class Event(namedtuple('Event', ('id', 'type', 'created', 'commits'))):
+    """An event reduced to its type, UTC epoch seconds and pushed commit count"""
+
+    __slots__ = ()
+
+    @property
+    def hour(self):
+        return self.created // 3600 % 24
+
+    @property
+    def day(self):
+        return date.fromordinal(EPOCH_ORDINAL + self.created // 86400)
+
+def epoch_seconds(value):
+    """Parse GitHub's fixed 'YYYY-MM-DDTHH:MM:SSZ' timestamps to UTC epoch seconds"""
+    days = date(int(value[0:4]), int(value[5:7]), int(value[8:10])).toordinal() - EPOCH_ORDINAL
+    return days * 86400 + int(value[11:13]) * 3600 + int(value[14:16]) * 60 + int(value[17:19])
+
+def repo_record(repo):
+    """Project a decoded repository object to a Repo"""
+    get = repo.get
+    return Repo(get('name'), get('full_name'), get('language'), get('stargazers_count') or 0,
+                get('forks_count') or 0, get('fork') or False, get('archived') or False, get('pushed_at'))
+
+def event_record(event):
+    """Project a decoded event object to an Event, counting commits instead of keeping the payload"""
+    commits = 0
+    if event['type'] == 'PushEvent':
+        commits = len(event.get('payload', {}).get('commits', []))
+    return Event(event.get('id'), event['type'], epoch_seconds(event['created_at']), commits)
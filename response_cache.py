@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentation import timed
+from local_data import private_path
+from records import Event, Repo
+
+# Response cache configuration
+GITHUB_CACHE_BACKEND = os.environ.get('GITHUB_CACHE_BACKEND', 'memory')  # memory, sqlite or none
+GITHUB_CACHE_PATH = os.environ.get('GITHUB_CACHE_PATH')  # Defaults to github-cache.sqlite3 in LOCAL_DATA_DIR
+GITHUB_CACHE_TTL = float(os.environ.get('GITHUB_CACHE_TTL', '60'))  # Seconds before an entry is revalidated
+GITHUB_CACHE_MAX_ENTRIES = int(os.environ.get('GITHUB_CACHE_MAX_ENTRIES', '1024'))
+
+# Response headers kept alongside the cached body
+CACHED_HEADERS = ('Link',)
+
+# Records a projected body may hold, stored as lists of their fields
+RECORD_TYPES = {'Repo': Repo, 'Event': Event}
+
+class CacheEntry:
+    """A cached GitHub API response body with its validators"""
+
+    __slots__ = ('data', 'etag', 'last_modified', 'headers', 'stored_at')
+
+    def __init__(self, data, etag=None, last_modified=None, headers=None, stored_at=None):
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.headers = headers or {}
+        self.stored_at = time.time() if stored_at is None else stored_at
+
+    def validators(self):
+        """Conditional request headers for revalidating this entry"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+def decode_entry(response, project=None):
+    """Decode a 200 response into a CacheEntry, mapping project over the items of a list body"""
+    with timed('json_decode'):
+        data = response.json()
+    if project is not None:
+        with timed('projection'):
+            data = [project(item) for item in data]
+    return CacheEntry(
+        data,
+        etag=response.headers.get('ETag'),
+        last_modified=response.headers.get('Last-Modified'),
+        headers={name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+    )
+
+class CachedResponse:
+    """Response-like view of a cache entry, exposing what the fetch_* functions use"""
+
+    status_code = 200
+
+    def __init__(self, entry):
+        from requests.structures import CaseInsensitiveDict
+        self._data = entry.data
+        self.headers = CaseInsensitiveDict(entry.headers)
+
+    def json(self):
+        return self._data
+
+    @property
+    def links(self):
+        header = self.headers.get('Link')
+        if not header:
+            return {}
+        from requests.utils import parse_header_links
+        return {link.get('rel') or link.get('url'): link for link in parse_header_links(header)}
+
+class MemoryBackend:
+    """In-process LRU store"""
+
+    def __init__(self, max_entries=GITHUB_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+def encode_body(data):
+    """(JSON text, record type name or None) for a cached body; a list of records is stored as field lists"""
+    record = type(data[0]).__name__ if isinstance(data, list) and data else None
+    return json.dumps(data), record if record in RECORD_TYPES else None
+
+def decode_body(text, record):
+    data = json.loads(text)
+    if record is None:
+        return data
+    record_type = RECORD_TYPES[record]
+    return [record_type(*fields) for fields in data]
+
+class SQLiteBackend:
+    """LRU store in a local SQLite file, so entries outlive the process.
+
+    Bodies are stored as JSON, with projected records as lists of their
+    fields, so reading the file never runs code from it.
+    """
+
+    def __init__(self, path=GITHUB_CACHE_PATH, max_entries=GITHUB_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        import sqlite3
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path or private_path('github-cache.sqlite3'), check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        # Earlier versions pickled the bodies
+        self._conn.execute('DROP TABLE IF EXISTS responses_v2')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses_v3 ('
+            'key TEXT PRIMARY KEY, data TEXT NOT NULL, record TEXT, etag TEXT, last_modified TEXT, '
+            'headers TEXT NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)'
+        )
+        self._conn.execute('CREATE INDEX IF NOT EXISTS responses_v3_accessed ON responses_v3 (accessed_at)')
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, record, etag, last_modified, headers, stored_at FROM responses_v3 WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE responses_v3 SET accessed_at = ? WHERE key = ?', (time.time(), key))
+        data, record, etag, last_modified, headers, stored_at = row
+        return CacheEntry(decode_body(data, record), etag, last_modified, json.loads(headers), stored_at)
+
+    def set(self, key, entry):
+        data, record = encode_body(entry.data)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses_v3 VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (key, data, record, entry.etag, entry.last_modified, json.dumps(entry.headers), entry.stored_at,
+                 time.time())
+            )
+            self._conn.execute(
+                'DELETE FROM responses_v3 WHERE key IN ('
+                'SELECT key FROM responses_v3 ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM responses_v3').fetchone()[0]
+
+class ResponseCache:
+    """TTL cache of GitHub API responses that revalidates with ETag/Last-Modified"""
+
+    def __init__(self, backend, ttl=GITHUB_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'misses': 0, 'revalidations': 0}
+
+    def count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def lookup(self, key):
+        """Return (entry, fresh) for a key; entry is None when nothing is cached"""
+        entry = self.backend.get(key)
+        if entry is None:
+            return None, False
+        return entry, time.time() - entry.stored_at < self.ttl
+
+    def store(self, key, response, project=None):
+        """Cache a 200 response, projected if project is given, and return the stored entry"""
+        entry = decode_entry(response, project)
+        self.backend.set(key, entry)
+        return entry
+
+    def refresh(self, key, entry):
+        """Restart an entry's TTL after GitHub confirmed it with a 304"""
+        entry.stored_at = time.time()
+        self.backend.set(key, entry)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats['hits'] + stats['misses'] + stats['revalidations']
+        stats['hit_rate'] = (stats['hits'] + stats['revalidations']) / lookups if lookups else 0.0
+        stats['backend'] = type(self.backend).__name__
+        stats['entries'] = len(self.backend)
+        return stats
+
+def create_cache(backend=GITHUB_CACHE_BACKEND):
+    """Build the response cache selected by GITHUB_CACHE_BACKEND, or None when disabled"""
+    if backend == 'none':
+        return None
+    if backend == 'sqlite':
+        return ResponseCache(SQLiteBackend())
+    if backend == 'memory':
+        return ResponseCache(MemoryBackend())
+    raise ValueError(f'Unknown GITHUB_CACHE_BACKEND: {backend}')
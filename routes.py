@@ -0,0 +1,170 @@
+"""The JSON API routes, registered by both Flask entry points (app.py and api/index.py)"""
+import math
+
+from flask import Blueprint, Response, current_app, jsonify, request, stream_with_context
+
+from concurrent_fetch import dedupe_logins, fan_out
+from core import (BATCH_MAX_USERS, admission, build_user_stats, fetch_user_data, fetch_user_events, fetches, github,
+                  history, inflight, language_sizes, last_known_events, mark_stale, org_crawler, refresher,
+                  render_readme, serve_metrics_snapshot, snapshots, stream_user_sections, user_stats)
+from github_client import UpstreamError
+from http_caching import cacheable
+from instrumentation import metrics
+from org_crawler import ORG_NAME, org_report
+from readme_renderer import README_TEMPLATES, renderer
+
+routes = Blueprint('routes', __name__)
+
+@routes.app_errorhandler(UpstreamError)
+def handle_upstream_error(error):
+    """Report GitHub failures instead of returning empty stats"""
+    response = jsonify({'error': str(error)})
+    response.status_code = error.http_status
+    if error.retry_after is not None:
+        response.headers['Retry-After'] = str(int(math.ceil(error.retry_after)))
+    return response
+
+def snapshot_response(body, fetched_at):
+    """JSON response for a metrics snapshot; last-known data is flagged stale and kept out of HTTP caches"""
+    if fetched_at is None:
+        return jsonify(body)
+    response = jsonify(mark_stale(body, fetched_at))
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@routes.route('/api/internal/stats', methods=['GET'])
+def get_internal_stats():
+    """Expose cache, coalescing, admission control and circuit breaker counters"""
+    return jsonify({
+        'admission': admission.stats(),
+        'circuit_breaker': github.breaker.stats(),
+        'cache': github.cache.stats() if github.cache else None,
+        'coalescing': inflight.stats(),
+        'shared_fetches': fetches.stats(),
+        'snapshots': snapshots.stats(),
+        'readme_renders': renderer.stats(),
+        'languages': language_sizes.stats(),
+        'refresh': refresher.stats(),
+        'history': history.stats() if history is not None else None
+    })
+
+@routes.route('/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics: stage latency histograms, upstream responses by status, cache hit rates"""
+    caches = {'snapshots': snapshots.stats(), 'repo_languages': language_sizes.repos.stats(),
+              'language_totals': language_sizes.aggregates.stats(), 'readme_renders': renderer.stats()}
+    if github.cache:
+        caches['upstream'] = github.cache.stats()
+    return Response(metrics.render(caches), mimetype='text/plain; version=0.0.4')
+
+@routes.route('/api/rate-limit', methods=['GET'])
+def get_rate_limit():
+    """Expose the remaining GitHub API budget for each configured token"""
+    return jsonify({
+        'reserve': github.token_pool.reserve,
+        'tokens': github.token_pool.stats()
+    })
+
+@routes.route('/api/user/<username>', methods=['GET'])
+@cacheable
+def get_user_stats(username):
+    """Get comprehensive user statistics"""
+    snapshot, fetched_at = serve_metrics_snapshot(username)
+    if snapshot is None:
+        return jsonify({'error': 'User not found'}), 404
+    
+    return snapshot_response(user_stats(username, snapshot), fetched_at)
+
+@routes.route('/api/user/<username>/activity', methods=['GET'])
+@cacheable
+def get_user_activity(username):
+    """24x7 hour/weekday heatmap, per-day counts and streaks, shifted by an optional ?tz=+05:30 offset"""
+    # Imported here so cold starts that never serve this route skip loading numpy
+    from vector_analytics import activity_profile, parse_tz_offset
+    tz_offset = parse_tz_offset(request.args.get('tz'))
+    if tz_offset is None:
+        return jsonify({'error': 'tz must be a UTC offset like +05:30 or -0800'}), 400
+    try:
+        with admission:
+            events = fetch_user_events(username)
+            if not events and not fetch_user_data(username):
+                return jsonify({'error': 'User not found'}), 404
+        fetched_at = None
+    except UpstreamError:
+        # Degraded like the stats endpoints: the stored history stands in for the events feed
+        events, fetched_at = last_known_events(username)
+        if events is None:
+            raise
+    
+    return snapshot_response({'username': username, **activity_profile(events, tz_offset)}, fetched_at)
+
+@routes.route('/api/user/<username>/stream', methods=['GET'])
+def stream_user_stats(username):
+    """Stream user statistics as NDJSON sections: user, repositories, activity, achievements"""
+    sections = stream_user_sections(username)
+    if sections is None:
+        return jsonify({'error': 'User not found'}), 404
+    
+    return Response(stream_with_context(sections), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@routes.route('/api/users', methods=['POST'])
+def get_users_stats():
+    """Get statistics for many users in one request"""
+    payload = request.get_json(silent=True)
+    logins = payload.get('usernames') if isinstance(payload, dict) else None
+    if not isinstance(logins, list) or not all(isinstance(login, str) for login in logins):
+        return jsonify({'error': 'Expected a JSON body like {"usernames": ["octocat"]}'}), 400
+    
+    logins = dedupe_logins(logins)
+    if len(logins) > BATCH_MAX_USERS:
+        return jsonify({'error': f'At most {BATCH_MAX_USERS} usernames per request'}), 400
+    
+    results = {}
+    errors = {}
+    for login, stats, error in fan_out(logins, build_user_stats):
+        if isinstance(error, UpstreamError):
+            errors[login] = {'error': str(error), 'status': error.http_status}
+        elif error is not None:
+            current_app.logger.exception('Batch stats failed for %s', login, exc_info=error)
+            errors[login] = {'error': 'Internal error', 'status': 500}
+        elif stats is None:
+            errors[login] = {'error': 'User not found', 'status': 404}
+        else:
+            results[login] = stats
+    
+    return jsonify({'results': results, 'errors': errors})
+
+@routes.route('/api/org/<org>', methods=['GET'])
+def get_org_stats(org):
+    """Org-wide aggregates and leaderboards; each call advances the crawl by one batch of members"""
+    if not ORG_NAME.match(org):
+        return jsonify({'error': 'Invalid organization name'}), 400
+    
+    restart = request.args.get('restart') == '1'
+    crawl = inflight.do(('org', org.lower()), org_crawler.step, org, restart)
+    if crawl is None:
+        return jsonify({'error': 'Organization not found'}), 404
+    
+    response = jsonify(org_report(crawl))
+    if not crawl.complete:
+        # Partial results: call again to continue the crawl
+        response.status_code = 202
+        if crawl.retry_after is not None:
+            response.headers['Retry-After'] = str(int(math.ceil(crawl.retry_after)))
+    return response
+
+@routes.route('/api/generate-readme/<username>', methods=['GET'])
+@cacheable
+def generate_readme(username):
+    """Generate README markdown with multiple template options; template=all renders every one"""
+    template = request.args.get('template', 'default')
+    
+    snapshot, fetched_at = serve_metrics_snapshot(username)
+    if snapshot is None:
+        return jsonify({'error': 'User not found'}), 404
+    
+    if template == 'all':
+        readmes = {name: render_readme(snapshot, name) for name in README_TEMPLATES}
+        return snapshot_response({'readmes': readmes, 'template': template}, fetched_at)
+    return snapshot_response({'readme': render_readme(snapshot, template), 'template': template}, fetched_at)
@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Metrics snapshot cache configuration
+METRICS_SNAPSHOT_TTL = float(os.environ.get('METRICS_SNAPSHOT_TTL', '300'))  # Seconds a computed snapshot is reused
+METRICS_SNAPSHOT_MAX_ENTRIES = int(os.environ.get('METRICS_SNAPSHOT_MAX_ENTRIES', '512'))
+METRICS_STALE_TTL = float(os.environ.get('METRICS_STALE_TTL', '3600'))  # Seconds past the TTL a snapshot may be served while it refreshes
+
+class SnapshotCache:
+    """Per-user TTL + LRU cache of computed metrics snapshots"""
+
+    def __init__(self, ttl=METRICS_SNAPSHOT_TTL, max_entries=METRICS_SNAPSHOT_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {'hits': 0, 'stale': 0, 'misses': 0}
+
+    def get(self, key):
+        """Return the snapshot for key if it is younger than the TTL"""
+        return self.lookup(key)[0]
+
+    def lookup(self, key, max_stale=0):
+        """Return (snapshot, fresh); a snapshot up to max_stale seconds past the TTL comes back with fresh False"""
+        with self._lock:
+            item = self._entries.get(key)
+            if item is not None:
+                age = time.time() - item[0]
+                if age < self.ttl + max_stale:
+                    self._entries.move_to_end(key)
+                    fresh = age < self.ttl
+                    self._counters['hits' if fresh else 'stale'] += 1
+                    return item[1], fresh
+            self._counters['misses'] += 1
+            return None, False
+
+    def last_known(self, key):
+        """(snapshot, time stored) for key however old it is, or (None, None); not counted as a lookup"""
+        with self._lock:
+            item = self._entries.get(key)
+            return (item[1], item[0]) if item is not None else (None, None)
+
+    def age(self, key):
+        """Seconds since key's snapshot was stored, or None; not counted as a lookup"""
+        with self._lock:
+            item = self._entries.get(key)
+            return time.time() - item[0] if item is not None else None
+
+    def set(self, key, snapshot):
+        with self._lock:
+            self._entries[key] = (time.time(), snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['entries'] = len(self._entries)
+        return stats
@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from github_stub import start_stub
+
+# The app reads its configuration at import, so point it at the stub before any test imports it
+_server, STUB_URL = start_stub()
+os.environ.update(GITHUB_API_URL=STUB_URL, GITHUB_CACHE_BACKEND='none', METRICS_SNAPSHOT_TTL='0',
+                  BACKGROUND_REFRESH='false', HISTORY_STORE='none')
+
+@pytest.fixture
+def client():
+    from api.index import app
+    return app.test_client()
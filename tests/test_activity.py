@@ -0,0 +1,10 @@
+import pytest
+
+@pytest.mark.parametrize('tz, offset', [('+05:30', 330), ('%2B05:30', 330), ('UTC+2', 120), ('-0800', -480), ('Z', 0)])
+def test_activity_accepts_documented_offsets(client, tz, offset):
+    response = client.get(f'/api/user/bench-3-40/activity?tz={tz}')
+    assert response.status_code == 200
+    assert response.get_json()['tz_offset_minutes'] == offset
+
+def test_activity_rejects_malformed_offset(client):
+    assert client.get('/api/user/bench-3-40/activity?tz=05:30').status_code == 400
@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import core
+from admission import AdmissionController, DeadlineExceeded, Overloaded
+from circuit_breaker import CircuitBreaker
+from concurrent_fetch import gather_user_bundle, result_by
+from github_stub import start_stub
+
+def test_full_queue_sheds_at_once():
+    admission = AdmissionController(max_active=1, queue_size=0, queue_timeout=5, retry_after=3)
+    with admission:
+        start = time.monotonic()
+        with pytest.raises(Overloaded) as raised:
+            admission.acquire()
+        assert time.monotonic() - start < 0.5
+    assert raised.value.retry_after == 3 and raised.value.http_status == 503
+    assert admission.stats()['shed'] == 1
+
+def test_queued_request_times_out_or_gets_the_released_slot():
+    admission = AdmissionController(max_active=1, queue_size=1, queue_timeout=0.1)
+    admission.acquire()
+    with pytest.raises(Overloaded):
+        admission.acquire()
+    assert admission.stats()['timed_out'] == 1
+
+    threading.Timer(0.05, admission.release).start()
+    admission.acquire()
+    assert admission.stats() == {'active': 1, 'waiting': 0, 'admitted': 2, 'queued': 2, 'shed': 0, 'timed_out': 1}
+
+def test_disabled_admission_never_sheds():
+    admission = AdmissionController(max_active=0, queue_size=0)
+    for _ in range(3):
+        admission.acquire()
+    assert admission.stats()['admitted'] == 0
+
+def test_breaker_opens_after_threshold_and_closes_after_a_successful_trial():
+    breaker = CircuitBreaker(threshold=2, cooldown=0.1)
+    breaker.record_failure()
+    assert breaker.check() is None
+    breaker.record_failure()
+    assert breaker.open and 0 < breaker.check() <= 0.1
+
+    time.sleep(0.1)
+    # One trial goes through; the others keep failing fast until it reports back
+    assert breaker.check() is None
+    assert breaker.check() is not None
+    breaker.record_success()
+    assert not breaker.open and breaker.check() is None
+    assert breaker.stats() == {'open': False, 'consecutive_failures': 0, 'opened': 1, 'rejected': 2, 'trials': 1}
+
+def test_breaker_waits_for_the_rate_limit_reset():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.1)
+    breaker.record_failure(retry_after=60)
+    assert breaker.check() > 59
+
+def test_deadline_cancels_queued_fetches():
+    pool = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    futures = {'user': pool.submit(release.wait), 'repos': pool.submit(list), 'events': pool.submit(list)}
+    try:
+        with pytest.raises(TimeoutError):
+            gather_user_bundle(futures, timeout=0.05)
+        assert not futures['user'].cancelled()
+        assert futures['repos'].cancelled() and futures['events'].cancelled()
+        # A request sharing a fetch cancelled at another's deadline gives up too
+        with pytest.raises(TimeoutError):
+            result_by(futures['repos'], None)
+    finally:
+        release.set()
+        pool.shutdown()
+
+def test_snapshot_build_past_the_deadline(monkeypatch):
+    server, url = start_stub(latency=0.3)
+    monkeypatch.setattr(core, 'GITHUB_API_URL', url)
+    try:
+        start = time.monotonic()
+        with pytest.raises(DeadlineExceeded) as raised:
+            core.refresh_metrics_snapshot('bench-3-10-deadline', 0.1)
+        assert time.monotonic() - start < 0.25
+        assert raised.value.http_status == 503
+    finally:
+        server.shutdown()
@@ -0,0 +1,49 @@
+import asyncio
+import json
+import re
+
+import asgi_app
+
+def asgi_get(*paths):
+    """Responses of GET requests to the ASGI app, as (status, headers, body)"""
+
+    async def get(path):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {'type': 'http', 'method': 'GET', 'path': path, 'query_string': b'', 'headers': []}
+        await asgi_app.app(scope, receive, send)
+        return messages[0]['status'], dict(messages[0]['headers']), b''.join(m.get('body', b'') for m in messages[1:])
+
+    async def run():
+        try:
+            return [await get(path) for path in paths]
+        finally:
+            # The client's session belongs to this event loop
+            if asgi_app.github is not None:
+                await asgi_app.github.aclose()
+                asgi_app.github = None
+
+    return asyncio.run(run())
+
+def test_page_lookup_path_is_served():
+    (status, _, page), = asgi_get('/')
+    assert status == 200
+    # The path the page's search form fetches, for a stub user
+    lookup = re.search(rb'fetch\(`(/api/user/\$\{username\}[^`]*)`\)', page).group(1).decode()
+    (status, headers, body), = asgi_get(lookup.replace('${username}', 'bench-4-20'))
+    assert status == 200
+    assert headers[b'content-type'] == b'application/x-ndjson'
+    sections = [json.loads(line) for line in body.decode().splitlines()]
+    assert [line['section'] for line in sections] == ['user', 'repositories', 'activity', 'achievements']
+    assert sections[0]['data']['login'] == 'bench-4-20'
+
+def test_stream_missing_user():
+    (status, _, body), = asgi_get('/api/user/no-such-user/stream')
+    assert status == 404
+    assert json.loads(body) == {'error': 'User not found'}
@@ -0,0 +1,25 @@
+import asyncio
+
+from async_client import AsyncGitHubClient
+from github_stub import start_stub
+from rate_limit import TokenPool
+
+def test_cancelled_request_releases_its_token():
+    server, url = start_stub(latency=0.5)
+
+    async def cancel_mid_flight():
+        client = AsyncGitHubClient(token_pool=TokenPool([]))
+        try:
+            task = asyncio.ensure_future(client.send(f'{url}/users/bench-1-1'))
+            await asyncio.sleep(0.1)
+            assert client.token_pool.stats()[0]['in_flight'] == 1
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+            return client.token_pool.stats()[0]['in_flight']
+        finally:
+            await client.aclose()
+
+    try:
+        assert asyncio.run(cancel_mid_flight()) == 0
+    finally:
+        server.shutdown()
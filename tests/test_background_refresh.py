@@ -0,0 +1,22 @@
+import app as app_module
+
+class RecordingRefresher:
+    running = False
+
+    def __init__(self):
+        self.starts = 0
+
+    def start(self):
+        self.starts += 1
+        self.running = True
+        return True
+
+def test_first_request_starts_refresher_without_debug_reloader(monkeypatch):
+    # As under gunicorn app:app: no WERKZEUG_RUN_MAIN, debug off
+    monkeypatch.delenv('WERKZEUG_RUN_MAIN', raising=False)
+    refresher = RecordingRefresher()
+    monkeypatch.setattr(app_module, 'refresher', refresher)
+    client = app_module.app.test_client()
+    client.get('/api/rate-limit')
+    client.get('/api/rate-limit')
+    assert refresher.starts == 1
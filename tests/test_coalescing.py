@@ -0,0 +1,37 @@
+import threading
+from collections import Counter
+
+import core
+from github_stub import start_stub
+
+def test_burst_of_lookups_fetches_a_user_once(client, monkeypatch):
+    server, url = start_stub(latency=0.2)
+    monkeypatch.setattr(core, 'GITHUB_API_URL', url)
+    calls = Counter()
+    send = core.github.send
+
+    def counting(call_url, *args, **kwargs):
+        calls[call_url.split('?')[0][len(url):]] += 1
+        return send(call_url, *args, **kwargs)
+
+    monkeypatch.setattr(core.github, 'send', counting)
+    app = client.application
+    statuses = []
+
+    def lookup(path):
+        response = app.test_client().get(path)
+        response.get_data()
+        statuses.append(response.status_code)
+
+    paths = ['/api/user/bench-6-30-burst/stream'] * 6 + ['/api/user/bench-6-30-burst'] * 2
+    threads = [threading.Thread(target=lookup, args=(path,)) for path in paths]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        server.shutdown()
+    assert statuses == [200] * len(paths)
+    assert calls == {'/users/bench-6-30-burst': 1, '/users/bench-6-30-burst/repos': 1,
+                     '/users/bench-6-30-burst/events': 1}
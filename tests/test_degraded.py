@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+import core
+from admission import AdmissionController
+from github_client import UpstreamError
+from history_store import HistoryStore
+
+def fail_github(monkeypatch, match=''):
+    """Make GitHub calls whose URL contains match fail as after exhausted retries"""
+    send = core.github.send
+
+    def failing(url, *args, **kwargs):
+        if match in url:
+            raise UpstreamError('GitHub returned 502', 502)
+        return send(url, *args, **kwargs)
+
+    monkeypatch.setattr(core.github, 'send', failing)
+
+def sections(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+def test_stream_serves_last_known_when_github_fails(client, monkeypatch):
+    assert client.get('/api/user/bench-5-20-down').status_code == 200
+    fail_github(monkeypatch)
+
+    response = client.get('/api/user/bench-5-20-down/stream')
+    assert response.status_code == 200
+    lines = sections(response)
+    assert [line['section'] for line in lines] == ['stale', 'user', 'repositories', 'activity', 'achievements']
+    assert lines[0]['data']['stale'] is True and lines[0]['data']['as_of']
+
+    stats = client.get('/api/user/bench-5-20-down')
+    assert stats.get_json()['stale'] is True
+    assert stats.headers['Cache-Control'] == 'no-store'
+    batch = client.post('/api/users', json={'usernames': ['bench-5-20-down']}).get_json()
+    assert batch['results']['bench-5-20-down']['stale'] is True
+
+def test_stream_falls_back_after_the_profile_was_sent(client, monkeypatch):
+    assert client.get('/api/user/bench-5-20-midway').status_code == 200
+    fail_github(monkeypatch, '/repos')
+
+    lines = sections(client.get('/api/user/bench-5-20-midway/stream'))
+    assert [line['section'] for line in lines] == ['user', 'stale', 'user', 'repositories', 'activity',
+                                                   'achievements']
+
+def test_stream_without_last_known_data_fails(client, monkeypatch):
+    fail_github(monkeypatch)
+    response = client.get('/api/user/bench-5-20-never/stream')
+    assert response.status_code == 502
+    assert response.get_json() == {'error': 'GitHub returned 502'}
+
+def test_shed_stream_is_a_503_with_retry_after(client, monkeypatch):
+    admission = AdmissionController(max_active=1, queue_size=0, retry_after=7)
+    monkeypatch.setattr(core, 'admission', admission)
+    with admission:
+        response = client.get('/api/user/bench-5-20-shed/stream')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '7'
+    assert admission.stats()['active'] == 0
+    # The slot is held until the stream has been sent, then given back
+    assert client.get('/api/user/bench-5-20-shed/stream').status_code == 200
+    assert admission.stats() == {'active': 0, 'waiting': 0, 'admitted': 2, 'queued': 0, 'shed': 1, 'timed_out': 0}
+
+def test_activity_falls_back_to_history(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(core, 'history', HistoryStore(str(tmp_path / 'history.sqlite3')))
+    assert client.get('/api/user/bench-5-20-history').status_code == 200
+    fail_github(monkeypatch)
+
+    response = client.get('/api/user/bench-5-20-history/activity')
+    assert response.status_code == 200
+    assert response.get_json()['stale'] is True
+    assert sum(response.get_json()['hours']) == 20
+    assert response.headers['Cache-Control'] == 'no-store'
+
+@pytest.mark.parametrize('path', ['/api/user/bench-5-20-gone/activity', '/api/users'])
+def test_without_last_known_data_errors_are_reported(client, monkeypatch, path):
+    fail_github(monkeypatch)
+    if path == '/api/users':
+        errors = client.post(path, json={'usernames': ['bench-5-20-gone']}).get_json()['errors']
+        assert errors['bench-5-20-gone']['status'] == 502
+    else:
+        assert client.get(path).status_code == 502
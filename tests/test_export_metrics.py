@@ -0,0 +1,26 @@
+import json
+
+import pytest
+
+from export_metrics import ExportFile
+
+@pytest.mark.parametrize('partial', ['', '{"login": "carol", "us', '{"login": "' + 'x' * 200000])
+def test_resume_cuts_partial_last_line(tmp_path, partial):
+    path = tmp_path / 'metrics.jsonl'
+    lines = [json.dumps({'login': login}) + '\n' for login in ('Alice', 'bob')]
+    path.write_text(''.join(lines) + partial, encoding='utf-8')
+
+    output = ExportFile(str(path), 'jsonl')
+    output.write({'login': 'dave'})
+    output.close()
+    assert output.done == {'alice', 'bob'}
+    assert path.read_text(encoding='utf-8') == ''.join(lines) + json.dumps({'login': 'dave'}) + '\n'
+
+def test_resume_csv_with_only_a_partial_header(tmp_path):
+    path = tmp_path / 'metrics.csv'
+    path.write_text('login,na', encoding='utf-8')
+
+    output = ExportFile(str(path), 'csv')
+    output.close()
+    assert output.done == set()
+    assert path.read_text(encoding='utf-8').startswith('login,name,')
@@ -0,0 +1,17 @@
+import core
+
+def test_graphql_backend_matches_rest(client, monkeypatch):
+    rest = client.get('/api/user/bench-12-40')
+    monkeypatch.setattr(core, 'GITHUB_FETCH_BACKEND', 'graphql')
+    graphql = client.get('/api/user/bench-12-40')
+    assert rest.status_code == graphql.status_code == 200
+
+    rest, graphql = rest.get_json(), graphql.get_json()
+    # Only the GraphQL backend can read the contribution calendar
+    assert 'contributions_last_year' not in rest['user']
+    assert graphql['user'].pop('contributions_last_year') == 40
+    assert graphql == rest
+
+def test_graphql_backend_missing_user(client, monkeypatch):
+    monkeypatch.setattr(core, 'GITHUB_FETCH_BACKEND', 'graphql')
+    assert client.get('/api/user/no-such-user').status_code == 404
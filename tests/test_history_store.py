@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+import pytest
+
+from history_store import HistoryStore
+from records import EPOCH_ORDINAL, Event
+
+TODAY = date(2026, 3, 20)
+TYPES = ('PushEvent', 'PullRequestEvent', 'IssuesEvent', 'WatchEvent', 'PullRequestReviewEvent')
+
+def event(event_id, day, hour=12, event_type='PushEvent', commits=0):
+    return Event(str(event_id), event_type, (day.toordinal() - EPOCH_ORDINAL) * 86400 + hour * 3600, commits)
+
+def feed(count=60):
+    """Events newest first, as the events feed returns them: several a day with a gap, ending today"""
+    events = []
+    for n in range(count):
+        day = TODAY - timedelta(days=n // 4 + (3 if n >= 24 else 0))
+        event_type = TYPES[n % len(TYPES)]
+        events.append(event(1000 - n, day, hour=(n * 7) % 24, event_type=event_type,
+                            commits=n % 3 + 1 if event_type == 'PushEvent' else 0))
+    return events
+
+@pytest.fixture
+def make_store(tmp_path):
+    def make(name='history'):
+        return HistoryStore(str(tmp_path / f'{name}.sqlite3'))
+    return make
+
+def ingest(store, events):
+    store.ingest('octocat', {'login': 'octocat'}, [], events)
+
+@pytest.mark.parametrize('order', ['oldest first', 'newest first'])
+def test_incremental_ingest_matches_full_ingest(make_store, order):
+    events = feed()
+    full = make_store('full')
+    ingest(full, events)
+
+    incremental = make_store('incremental')
+    batches = [events[start:start + 15] for start in range(0, len(events), 15)]
+    # Oldest first is the usual refresh; newest first backfills older days and rebuilds the streak state
+    for batch in reversed(batches) if order == 'oldest first' else batches:
+        ingest(incremental, batch)
+
+    assert incremental.event_stats('octocat', TODAY) == full.event_stats('octocat', TODAY)
+    assert incremental.last_event_id('octocat') == full.last_event_id('octocat') == 1000
+    assert incremental.stats() == full.stats() == {'users': 1, 'events': 60}
+
+def test_overlapping_pages_are_not_double_counted(make_store):
+    events = feed()
+    store = make_store()
+    # Each refresh rereads pages already stored, as the feed only ever grows at the front
+    for start in (40, 25, 10, 0, 0):
+        ingest(store, events[start:start + 20])
+
+    single = make_store('single')
+    ingest(single, events)
+    stats = store.event_stats('octocat', TODAY)
+    assert stats == single.event_stats('octocat', TODAY)
+    assert sum(stats['activity'].values()) == 60
+    assert stats['contributions']['commits'] == sum(e.commits for e in events if e.type == 'PushEvent')
+    assert store.stats()['events'] == 60
+
+def test_streak_spans_ingest_boundary(make_store):
+    days = [TODAY - timedelta(days=n) for n in range(5)]
+    store = make_store()
+    ingest(store, [event(10 + n, day) for n, day in enumerate(reversed(days[2:]))])
+    assert store.event_stats('octocat', days[2])['streak'] == {'current_streak': 3, 'longest_streak': 3,
+                                                               'total_days': 3}
+
+    # The next refresh starts on the day after the last one stored and shares its last event
+    ingest(store, [event(12, days[2])] + [event(20 + n, day) for n, day in enumerate(reversed(days[:2]))])
+    assert store.event_stats('octocat', TODAY)['streak'] == {'current_streak': 5, 'longest_streak': 5,
+                                                            'total_days': 5}
+    assert store.event_stats('octocat', TODAY + timedelta(days=2))['streak'] == {'current_streak': 0,
+                                                                                 'longest_streak': 5,
+                                                                                 'total_days': 5}
@@ -0,0 +1,11 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import begin_request, record, server_timing, submit_in_context
+
+def test_pool_threads_record_into_the_submitting_request():
+    begin_request()
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        submit_in_context(pool, record, 'github_fetch', 0.002).result()
+        # A plain submit runs in the worker's own context, so its timing is not the request's
+        pool.submit(record, 'github_fetch', 0.5).result()
+    assert server_timing() == 'github_fetch;dur=2.0'
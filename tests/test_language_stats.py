@@ -0,0 +1,44 @@
+import pytest
+
+from github_client import CircuitOpen, UpstreamError
+from language_stats import LanguageStats
+from records import Repo
+
+REPOS = [Repo(name, f'octocat/{name}', 'Python', 0, 0, False, False, '2026-01-01T00:00:00Z')
+         for name in ('alpha', 'empty', 'gamma')]
+
+def test_repo_without_breakdown_is_left_out_and_retried():
+    calls = []
+
+    def fetch_languages(full_name):
+        calls.append(full_name)
+        if full_name == 'octocat/empty' and calls.count(full_name) == 1:
+            raise UpstreamError('GitHub returned 409', 409)
+        return {'Python': 100, 'C': 10}
+
+    stats = LanguageStats(fetch_languages)
+    assert stats.aggregate(REPOS) == ({'Python': 200, 'C': 20}, True)
+    # Partial totals are not cached, and only the skipped repo is fetched again
+    assert stats.aggregate(REPOS) == ({'Python': 300, 'C': 30}, False)
+    assert sorted(calls) == ['octocat/alpha', 'octocat/empty', 'octocat/empty', 'octocat/gamma']
+    assert stats.aggregate(REPOS) == ({'Python': 300, 'C': 30}, False)
+    assert len(calls) == 4
+
+@pytest.mark.parametrize('error', [UpstreamError('GitHub rate limit exceeded', 403, retry_after=60),
+                                   UpstreamError('GitHub returned 502', 502),
+                                   CircuitOpen('GitHub is unavailable', 503, retry_after=30)])
+def test_upstream_failure_fails_the_aggregate(error):
+    calls = []
+
+    def fetch_languages(full_name):
+        calls.append(full_name)
+        if full_name == 'octocat/empty':
+            raise error
+        return {'Python': 100}
+
+    stats = LanguageStats(fetch_languages)
+    with pytest.raises(UpstreamError) as raised:
+        stats.aggregate(REPOS)
+    assert raised.value is error
+    # What did arrive is kept for the retry
+    assert stats.repos.stats()['entries'] == 2
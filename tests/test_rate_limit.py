@@ -0,0 +1,16 @@
+from rate_limit import TokenPool
+
+def test_stats_label_tokens_by_position():
+    tokens = ['ghp_secretAAAA1234', 'ghp_secretBBBB5678']
+    stats = TokenPool(tokens).stats()
+    assert [entry['token'] for entry in stats] == ['token-0', 'token-1']
+    assert not any(token[-4:] in str(stats) for token in tokens)
+    assert TokenPool([]).stats()[0]['token'] == 'anonymous'
+
+def test_rate_limit_endpoint_hides_tokens(client, monkeypatch):
+    import core
+    monkeypatch.setattr(core.github, 'token_pool', TokenPool(['ghp_secretCCCC9012']))
+    response = client.get('/api/rate-limit')
+    assert response.status_code == 200
+    assert '9012' not in response.get_data(as_text=True)
+    assert response.get_json()['tokens'][0]['token'] == 'token-0'
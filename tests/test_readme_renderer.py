@@ -0,0 +1,43 @@
+import os
+
+import pytest
+
+import core
+from readme_renderer import PLACEHOLDERS, README_TEMPLATE_DIR, README_TEMPLATES, RenderInputs, ReadmeRenderer
+
+USER = {'login': 'octocat', 'name': 'The Octocat', 'bio': 'Hi', 'location': 'SF', 'company': 'GitHub',
+        'blog': 'https://github.blog', 'twitter_username': 'github', 'public_repos': 8, 'followers': 9, 'following': 1}
+LANGUAGES = {'Python': 3, 'Go': 1}
+EXTRAS = {'contributions': {'total_contributions': 12}, 'streak': {'current_streak': 2, 'longest_streak': 5},
+          'achievements': [{'name': 'Popular', 'description': '100+ followers', 'icon': '⭐'}]}
+
+@pytest.mark.parametrize('template', README_TEMPLATES)
+def test_render_matches_str_format(template):
+    with open(os.path.join(README_TEMPLATE_DIR, f'{template}.md'), encoding='utf-8') as f:
+        source = f.read()
+    inputs = RenderInputs(USER, LANGUAGES, 40, 4, EXTRAS['contributions'], EXTRAS['streak'], EXTRAS['achievements'])
+    expected = source.format(**{field: getter(inputs) for field, getter in PLACEHOLDERS.items()})
+    assert ReadmeRenderer().render(template, USER, LANGUAGES, 40, 4, **EXTRAS) == expected
+
+def test_memo_hit_does_not_read_inputs():
+    renderer = ReadmeRenderer()
+    readme = renderer.render('detailed', USER, LANGUAGES, 40, 4, key='digest', **EXTRAS)
+    # None inputs would raise if evaluated; a hit on the key returns before touching them
+    assert renderer.render('detailed', None, None, None, None, key='digest') == readme
+    assert renderer.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+
+def test_unkeyed_render_is_not_memoized():
+    renderer = ReadmeRenderer()
+    renderer.render('minimal', USER, LANGUAGES, 40, 4)
+    assert renderer.stats() == {'hits': 0, 'misses': 0, 'entries': 0}
+
+def test_snapshot_digest_follows_readme_inputs():
+    repo_stats = {'languages': dict(LANGUAGES), 'language_bytes': None, 'language_bytes_partial': False,
+                  'total_stars': 40, 'total_forks': 4}
+    event_stats = {'contributions': EXTRAS['contributions'], 'streak': EXTRAS['streak']}
+    snapshot = core.assemble_snapshot(dict(USER), repo_stats, event_stats, EXTRAS['achievements'])
+    assert core.assemble_snapshot(dict(USER), repo_stats, event_stats,
+                                  EXTRAS['achievements'])['readme_digest'] == snapshot['readme_digest']
+    changed = core.assemble_snapshot(dict(USER, followers=10), repo_stats, event_stats, EXTRAS['achievements'])
+    assert changed['readme_digest'] != snapshot['readme_digest']
+    assert core.render_readme(changed, 'default') != core.render_readme(snapshot, 'default')
@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from local_data import private_path
+from records import Event, Repo
+from response_cache import CacheEntry, SQLiteBackend
+
+@pytest.mark.parametrize('data', [
+    {'login': 'octocat', 'followers': 3},
+    [Repo('hello', 'octocat/hello', 'Python', 2, 1, False, False, '2026-01-01T00:00:00Z', {'Python': 10})],
+    [Event('42', 'PushEvent', 1767225600, 3)],
+    ['octocat', 'hubot'],
+    [],
+])
+def test_sqlite_entries_round_trip_as_json(tmp_path, data):
+    path = str(tmp_path / 'cache.sqlite3')
+    SQLiteBackend(path).set('key', CacheEntry(data, etag='"abc"', headers={'Link': '<x>; rel="next"'}))
+
+    entry = SQLiteBackend(path).get('key')
+    assert entry.data == data
+    assert [type(item) for item in entry.data] == [type(item) for item in data]
+    assert (entry.etag, entry.headers) == ('"abc"', {'Link': '<x>; rel="next"'})
+
+def test_private_path_creates_a_directory_only_this_user_can_access(tmp_path):
+    path = private_path('cache.sqlite3', str(tmp_path / 'data'))
+    assert path == str(tmp_path / 'data' / 'cache.sqlite3')
+    assert os.stat(tmp_path / 'data').st_mode & 0o777 == 0o700
+
+def test_private_path_refuses_a_shared_directory(tmp_path):
+    shared = tmp_path / 'shared'
+    shared.mkdir()
+    shared.chmod(0o777)
+    with pytest.raises(RuntimeError):
+        private_path('cache.sqlite3', str(shared))
@@ -0,0 +1,94 @@
+import re
+from datetime import date, datetime, timedelta, timezone
+
+import numpy as np
+
+from records import EPOCH_ORDINAL
+
+TZ_OFFSET = re.compile(r'^(?:UTC)?([+-])(\d{1,2})(?::?(\d{2}))?$')
+
+# 1970-01-01 was a Thursday; date.weekday() numbering, Monday is 0
+EPOCH_WEEKDAY = 3
+
+def parse_tz_offset(value):
+    """Minutes east of UTC from 'Z', '+05:30', '-0800' or 'UTC+2'; None if malformed or out of range"""
+    # An unencoded + in a query string arrives as a space, e.g. ?tz=+05:30 as ' 05:30'
+    value = (value or '').replace(' ', '+').strip().upper()
+    if value in ('', 'Z', 'UTC'):
+        return 0
+    match = TZ_OFFSET.match(value)
+    if not match:
+        return None
+    sign, hours, minutes = match.groups()
+    offset = int(hours) * 60 + int(minutes or 0)
+    offset = -offset if sign == '-' else offset
+    return offset if abs(offset) <= 14 * 60 else None
+
+def epoch_array(events):
+    """int64 UTC epoch seconds of Event records"""
+    return np.fromiter((event.created for event in events), dtype=np.int64, count=len(events))
+
+def local_days_and_hours(epochs, tz_offset=0):
+    """Local epoch day and hour of day for each timestamp at a fixed offset in minutes"""
+    local = epochs + tz_offset * 60
+    return local // 86400, local // 3600 % 24
+
+def heatmap(epochs, tz_offset=0):
+    """7x24 event counts by weekday (Monday first) and local hour"""
+    days, hours = local_days_and_hours(epochs, tz_offset)
+    weekdays = (days + EPOCH_WEEKDAY) % 7
+    return np.bincount(weekdays * 24 + hours, minlength=7 * 24).reshape(7, 24)
+
+def top_hours(epochs, tz_offset=0, limit=5):
+    """Busiest hours, ties in first-seen order; matches analyze_activity_times at offset 0"""
+    _, hours = local_days_and_hours(epochs, tz_offset)
+    seen, first_index, counts = np.unique(hours, return_index=True, return_counts=True)
+    order = np.lexsort((first_index, -counts))[:limit]
+    return [{'hour': int(seen[i]), 'count': int(counts[i])} for i in order]
+
+def daily_counts(epochs, tz_offset=0):
+    """(sorted active local epoch days, events per day)"""
+    days, _ = local_days_and_hours(epochs, tz_offset)
+    return np.unique(days, return_counts=True)
+
+def streaks(active_days, today):
+    """Current and longest streak over sorted unique epoch days; matches event_analytics.calculate_streaks"""
+    if not len(active_days):
+        return 0, 0
+    # Lengths of runs of consecutive days, oldest first
+    breaks = np.flatnonzero(np.diff(active_days) != 1)
+    bounds = np.concatenate(([0], breaks + 1, [len(active_days)]))
+    runs = np.diff(bounds)
+
+    current_streak = int(runs[-1]) if today - active_days[-1] <= 1 else 0
+    # As in the loop version, a lone active day only counts towards the current streak
+    multi_day = runs[runs > 1]
+    longest_streak = int(multi_day.max()) if len(multi_day) else 0
+    return current_streak, max(longest_streak, current_streak)
+
+def local_today(tz_offset=0):
+    """Today's epoch day at a fixed offset in minutes"""
+    now = datetime.now(timezone.utc) + timedelta(minutes=tz_offset)
+    return now.date().toordinal() - EPOCH_ORDINAL
+
+def activity_profile(events, tz_offset=0, today=None):
+    """Heatmap, hour and weekday histograms, per-day counts and streaks at a fixed UTC offset"""
+    epochs = epoch_array(events)
+    grid = heatmap(epochs, tz_offset)
+    active_days, per_day = daily_counts(epochs, tz_offset)
+    today = local_today(tz_offset) if today is None else today.toordinal() - EPOCH_ORDINAL
+    current_streak, longest_streak = streaks(active_days, today)
+    return {
+        'tz_offset_minutes': tz_offset,
+        'heatmap': grid.tolist(),
+        'hours': grid.sum(axis=0).tolist(),
+        'weekdays': grid.sum(axis=1).tolist(),
+        'top_hours': top_hours(epochs, tz_offset),
+        'daily': {date.fromordinal(EPOCH_ORDINAL + int(day)).isoformat(): int(count)
+                  for day, count in zip(active_days, per_day)},
+        'streak': {
+            'current_streak': current_streak,
+            'longest_streak': longest_streak,
+            'total_days': len(active_days)
+        }
+    }